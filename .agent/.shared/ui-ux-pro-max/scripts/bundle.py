@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Bundle - precompiles every domain and stack CSV into data/index.bundle
+so a fresh install answers its first query without parsing CSVs or fitting BM25.
+
+Usage: python bundle.py [--output PATH] [--check] [--json]
+
+The bundle stores each CSV's rows and fitted index under the CSV's sha256; a CSV
+edited after bundling is simply indexed from source again. It also holds the
+domain vocabulary of search.py's domain auto-detection, keyed by the domain CSVs,
+and the materialized design system of every product type, keyed by the content
+of the data files and scripts it depends on. Rebuild after changing the data files or
+the index layout (INDEX_VERSION).
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from core import (ALL_DOMAINS, BUNDLE_FILE, DATA_DIR, _COMBINED_BUNDLE_KEY, _VOCABULARY_BUNDLE_KEY, _all_sources,
+                  _bundle_key, _bundle_toc, _sources_digest, _vocabulary_sources, build_bundle)
+from design_system import TABLE_BUNDLE_KEY, _inputs_digest, _table_inputs, bundle_segment
+
+
+def check_bundle(path):
+    """Report, per CSV, whether the bundle holds an index for its current content"""
+    toc = _bundle_toc(path)
+    entries = toc[0] if toc else {}
+    sources = _all_sources()
+    checks = [(name, filepath.relative_to(DATA_DIR).as_posix(), _bundle_key(filepath, config),
+               hashlib.sha256(filepath.read_bytes()).hexdigest()) for name, filepath, config in sources]
+    checks.append((ALL_DOMAINS, "*", _COMBINED_BUNDLE_KEY, _sources_digest(sources)))
+    checks.append(("vocabulary", "*", _VOCABULARY_BUNDLE_KEY, _sources_digest(_vocabulary_sources())))
+    checks.append(("design_system", "*", TABLE_BUNDLE_KEY, _inputs_digest(_table_inputs())))
+
+    report = []
+    for name, file, key, digest in checks:
+        entry = entries.get(key)
+        status = "missing" if not entry else ("ok" if entry["sha256"] == digest else "stale")
+        report.append({"source": name, "file": file, "status": status})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompile UI Pro Max search indexes")
+    parser.add_argument("--output", "-o", type=Path, default=BUNDLE_FILE, help="Bundle path")
+    parser.add_argument("--check", action="store_true", help="Verify the bundle matches the CSVs instead of building")
+    parser.add_argument("--json", action="store_true", help="Output JSON")
+    args = parser.parse_args()
+
+    report = check_bundle(args.output) if args.check else build_bundle(args.output, [(TABLE_BUNDLE_KEY, "design_system", bundle_segment)])
+    if args.json:
+        print(json.dumps(report, indent=2))
+    elif args.check:
+        for item in report:
+            print(f"{item['status']:8} {item['source']:20} {item['file']}")
+    else:
+        for item in report:
+            print(f"{item['source']:20} {item['rows']:5} rows {item['bytes']:9,} bytes {item['build_ms']:8.2f} ms")
+        print(f"Wrote {args.output} ({args.output.stat().st_size:,} bytes)")
+
+    if args.check and any(item["status"] != "ok" for item in report):
+        sys.exit(1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Client - sends one JSON-lines request to a running search server
+(python search.py --serve) over its Unix domain socket.
+
+Only the standard library is imported here, so a query the server answers costs
+no more than interpreter start-up: search.py imports core (and builds or loads
+indexes) only when no server is listening. socket itself is imported only once a
+server socket exists, keeping it off that in-process path too.
+"""
+
+import hashlib
+import json
+import os
+
+
+# ============ CONFIGURATION ============
+def _data_dir():
+    """The data directory core.DATA_DIR resolves to, without importing core"""
+    default = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    return os.path.realpath(os.environ.get("UIPRO_DATA_DIR") or default)
+
+
+def _runtime_dir():
+    """Per-user socket directory: $XDG_RUNTIME_DIR, else a ui-ux-pro-max-<uid> directory the server creates 0700"""
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.environ["XDG_RUNTIME_DIR"]
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.path.join(os.environ.get("TMPDIR") or "/tmp", f"ui-ux-pro-max-{uid}")
+
+
+def _default_socket_path():
+    """Per-user socket path, distinct for each copy of the data directory"""
+    data_key = hashlib.sha1(_data_dir().encode("utf-8")).hexdigest()[:8]
+    return os.path.join(_runtime_dir(), f"ui-ux-pro-max-{data_key}.sock")
+
+
+SOCKET_PATH = os.environ.get("UIPRO_SOCKET") or _default_socket_path()
+CLIENT_TIMEOUT = 5.0
+
+
+# ============ CLIENT ============
+def _is_private(path: str) -> bool:
+    """True when path (not followed if a symlink) is the current user's and not writable by group or others."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _connect(path: str, timeout: float):
+    """Open a connection to a running server, or None when nobody is listening.
+
+    A socket, or a directory holding it, that another user owns or could have
+    replaced is treated as no server at all.
+    """
+    if not os.path.lexists(path):
+        return None
+    import socket
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    if not (_is_private(os.path.dirname(os.path.abspath(path))) and _is_private(path)):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request_server(request: dict, path: str = SOCKET_PATH, timeout: float = CLIENT_TIMEOUT):
+    """Send one request to a running server; returns None when no server answers."""
+    sock = _connect(path, timeout)
+    if sock is None:
+        return None
+    try:
+        with sock, sock.makefile("rwb") as stream:
+            stream.write((json.dumps(request) + "\n").encode("utf-8"))
+            stream.flush()
+            line = stream.readline()
+    except OSError:
+        return None
+    return json.loads(line) if line else None
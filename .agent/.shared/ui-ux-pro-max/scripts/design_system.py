@@ -7,12 +7,27 @@ to generate comprehensive design system recommendations.
 Usage:
     from design_system import generate_design_system
     result = generate_design_system("SaaS dashboard", "My Project")
+    for record in generate_design_systems(["fintech crypto", {"query": "spa", "format": "json"}]):
+        print(record["line"], record["design_system"])
+
+The design system of every product type in products.csv can be materialized into
+the index cache (search.py --build-indexes) or the bundle (bundle.py), so a query
+naming a product type is answered without searching (see load_design_systems).
+The table is keyed by the content of the data files and of this code; queries
+never build it, they generate directly while it is missing or stale.
 """
 
+import copy
 import csv
+import hashlib
 import json
+import os
+import time
+from _thread import RLock, allocate_lock
+from collections import defaultdict
 from pathlib import Path
-from core import search, DATA_DIR
+from core import (BM25, CACHE_DIR, CSV_CONFIG, DATA_DIR, INDEX_VERSION, _load_index, _object_path, _prune_objects,
+                  _read_bundle_segment, _read_cache, _ref_path, _write_cache, search)
 
 
 # ============ CONFIGURATION ============
@@ -26,6 +41,16 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+DEFAULT_REASONING = {
+    "pattern": "Hero + Features + CTA",
+    "style_priority": ["Minimalism", "Flat Design"],
+    "color_mood": "Professional",
+    "typography_mood": "Clean",
+    "key_effects": "Subtle hover transitions",
+    "anti_patterns": "",
+    "decision_rules": {},
+    "severity": "MEDIUM"
+}
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
@@ -33,6 +58,7 @@ class DesignSystemGenerator:
 
     def __init__(self):
         self.reasoning_data = self._load_reasoning()
+        self._compile_reasoning()
 
     def _load_reasoning(self) -> list:
         """Load reasoning rules from CSV."""
@@ -42,69 +68,67 @@ class DesignSystemGenerator:
         with open(filepath, 'r', encoding='utf-8') as f:
             return list(csv.DictReader(f))
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
+    def _style_search(self, query: str, style_priority: list = None) -> dict:
+        """Search styles, also with the first two priority keywords when there are any."""
+        if style_priority:
+            query = f"{query} {' '.join(style_priority[:2])}"
+        return search(query, "style", SEARCH_CONFIG["style"]["max_results"])
+
+    def _multi_domain_search(self, query: str, style_priority: list = None, product_result: dict = None) -> dict:
+        """Execute searches across multiple domains, reusing product_result when the product search already ran."""
         results = {}
         for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
+            if domain == "style":
+                results[domain] = self._style_search(query, style_priority)
+            elif domain == "product" and product_result is not None:
+                results[domain] = product_result
             else:
                 results[domain] = search(query, domain, config["max_results"])
         return results
 
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
-
-    def _apply_reasoning(self, category: str, search_results: dict) -> dict:
-        """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
-
-        if not rule:
-            return {
-                "pattern": "Hero + Features + CTA",
-                "style_priority": ["Minimalism", "Flat Design"],
-                "color_mood": "Professional",
-                "typography_mood": "Clean",
-                "key_effects": "Subtle hover transitions",
-                "anti_patterns": "",
-                "decision_rules": {},
-                "severity": "MEDIUM"
-            }
-
-        # Parse decision rules JSON
+    def _compile_reasoning(self):
+        """Build the rule lookup tables once and pre-parse every rule's reasoning.
+
+        _exact_rules maps a lowercased UI_Category to its first rule;
+        _keyword_rules and _gram_rules map each category keyword and trigram
+        to the rules holding it, in file order. _reasoning holds the _apply_reasoning dict of every rule
+        (Decision_Rules JSON decoded, Style_Priority split), and _resolved
+        caches category lookups.
+        """
+        self._categories = [(rule.get("UI_Category") or "").lower() for rule in self.reasoning_data]
+        self._exact_rules = {}
+        self._keyword_rules = defaultdict(list)
+        self._gram_rules = defaultdict(list)
+        self._bare_rules = []  # rules whose category has no keywords
+        for index, ui_cat in enumerate(self._categories):
+            self._exact_rules.setdefault(ui_cat, index)
+            keywords = set(self._keywords(ui_cat))
+            for kw in keywords:
+                self._keyword_rules[kw].append(index)
+            if not keywords:
+                self._bare_rules.append(index)
+            for gram in {ui_cat[i:i + 3] for i in range(len(ui_cat) - 2)}:
+                self._gram_rules[gram].append(index)
+        self._reasoning = [self._parse_rule(rule) for rule in self.reasoning_data]
+        self._resolved = {}
+
+    @staticmethod
+    def _keywords(text: str) -> list:
+        """Words of a category, splitting on "/" and "-" too."""
+        return text.replace("/", " ").replace("-", " ").split()
+
+    @staticmethod
+    def _parse_rule(rule: dict) -> dict:
+        """The _apply_reasoning fields of one rule row."""
         decision_rules = {}
         try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
+            decision_rules = json.loads(rule.get("Decision_Rules") or "{}")
         except json.JSONDecodeError:
             pass
 
         return {
             "pattern": rule.get("Recommended_Pattern", ""),
-            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
+            "style_priority": [s.strip() for s in (rule.get("Style_Priority") or "").split("+")],
             "color_mood": rule.get("Color_Mood", ""),
             "typography_mood": rule.get("Typography_Mood", ""),
             "key_effects": rule.get("Key_Effects", ""),
@@ -113,6 +137,48 @@ class DesignSystemGenerator:
             "severity": rule.get("Severity", "MEDIUM")
         }
 
+    def _rule_index(self, category: str):
+        """Index of the rule for a category, or None.
+
+        The first rule (in file order) whose category equals it, else the first
+        whose category is contained in it or contains it, else the first with a
+        category keyword inside it. A keyword can only occur inside one of the
+        category's own words, so those words' substrings are looked up in the
+        keyword map; a rule category inside it holds such a keyword, and rules
+        containing it share its rarest trigram. No pass scans every rule.
+        """
+        category_lower = category.lower()
+        if category_lower in self._resolved:
+            return self._resolved[category_lower]
+
+        index = self._exact_rules.get(category_lower)
+        if index is None:
+            substrings = {word[i:j] for word in self._keywords(category_lower)
+                          for i in range(len(word)) for j in range(i + 1, len(word) + 1)}
+            matched = [self._keyword_rules[sub] for sub in substrings & self._keyword_rules.keys()]
+            partial = [i for i in set(self._bare_rules).union(*matched) if self._categories[i] in category_lower]
+            n = len(category_lower)
+            if n >= 3:
+                grams = [self._gram_rules.get(category_lower[i:i + 3], ()) for i in range(n - 2)]
+                partial += [i for i in min(grams, key=len) if category_lower in self._categories[i]]
+            else:
+                partial += [i for i, ui_cat in enumerate(self._categories) if category_lower in ui_cat]
+            index = min(partial) if partial else min((rules[0] for rules in matched), default=None)
+        self._resolved[category_lower] = index
+        return index
+
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category."""
+        index = self._rule_index(category)
+        return {} if index is None else self.reasoning_data[index]
+
+    def _apply_reasoning(self, category: str, search_results: dict) -> dict:
+        """Apply reasoning rules to search results."""
+        index = self._rule_index(category)
+        reasoning = DEFAULT_REASONING if index is None else self._reasoning[index]
+        return {**reasoning, "style_priority": list(reasoning["style_priority"]),
+                "decision_rules": dict(reasoning["decision_rules"])}
+
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
         if not results:
@@ -157,7 +223,7 @@ class DesignSystemGenerator:
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
         # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
+        product_result = search(query, "product", SEARCH_CONFIG["product"]["max_results"])
         product_results = product_result.get("results", [])
         category = "General"
         if product_results:
@@ -167,9 +233,8 @@ class DesignSystemGenerator:
         reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Multi-domain search with style priority hints, reusing the product search
+        search_results = self._multi_domain_search(query, style_priority, product_result)
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -230,6 +295,161 @@ class DesignSystemGenerator:
         }
 
 
+# ============ MATERIALIZED DESIGN SYSTEMS ============
+# Every search generate() runs depends on the query only through its tokens, so a
+# query tokenized like a product type (and without "quoted" phrases) gets exactly
+# the design system generated for that product type's name.
+_TABLE_CONFIG = {"search_cols": ["design_system"], "output_cols": []}
+TABLE_BUNDLE_KEY = ("design-systems", repr(_TABLE_CONFIG))
+_TABLE = {}  # "inputs" version -> "table" (None when not materialized)
+_TABLE_LOCK = RLock()
+_GENERATOR = {}
+_GENERATOR_LOCK = allocate_lock()
+_TOKENIZER = BM25()
+
+
+def _generator() -> DesignSystemGenerator:
+    """Generator shared by every call, recreated when ui-reasoning.csv changes."""
+    filepath = DATA_DIR / REASONING_FILE
+    stat = filepath.stat() if filepath.exists() else None
+    version = (stat.st_size, stat.st_mtime_ns) if stat else None
+    with _GENERATOR_LOCK:
+        if _GENERATOR.get("version") != version or "generator" not in _GENERATOR:
+            _GENERATOR.update(version=version, generator=DesignSystemGenerator())
+        return _GENERATOR["generator"]
+
+
+def _query_key(query: str):
+    """Token tuple a query is looked up by, or None for queries with phrases."""
+    return None if '"' in str(query) else tuple(_TOKENIZER.tokenize(query))
+
+
+def _table_inputs() -> list:
+    """Files the materialized table depends on: the searched CSVs, the rules and this code."""
+    files = [DATA_DIR / CSV_CONFIG[domain]["file"] for domain in SEARCH_CONFIG]
+    files += [DATA_DIR / REASONING_FILE, Path(__file__), Path(__file__).with_name("core.py")]
+    return [filepath for filepath in files if filepath.exists()]
+
+
+def _settings() -> tuple:
+    """Index layout, search limits and the ranking settings read from the environment."""
+    return (INDEX_VERSION, repr(SEARCH_CONFIG), os.environ.get("UIPRO_FUZZY_PENALTY"),
+            os.environ.get("UIPRO_PROXIMITY_WEIGHT"))
+
+
+def _inputs_version(files: list) -> tuple:
+    """Settings plus path, size and mtime of every input, for the cheap up-to-date check."""
+    return _settings() + tuple((str(filepath), stat.st_size, stat.st_mtime_ns)
+                               for filepath, stat in ((f, f.stat()) for f in files))
+
+
+def _inputs_digest(files: list) -> str:
+    """Content hash of the settings and of every input."""
+    digest = hashlib.sha256(repr(_settings()).encode("utf-8"))
+    for filepath in files:
+        digest.update(filepath.name.encode("utf-8"))
+        digest.update(hashlib.sha256(filepath.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def _product_types() -> list:
+    """Distinct product types of products.csv, in file order."""
+    config = CSV_CONFIG["product"]
+    filepath = DATA_DIR / config["file"]
+    if not filepath.exists():
+        return []
+    rows, _ = _load_index(filepath, config)
+    return list(dict.fromkeys(str(value) for value in rows.column("Product Type") if value))
+
+
+def build_design_systems() -> dict:
+    """Generate the design system of every product type.
+
+    Returns {"product_types": {query tokens: product type}, "records":
+    {product type: generate() result}}; the first product type with given
+    tokens wins.
+    """
+    generator = _generator()
+    table = {"product_types": {}, "records": {}}
+    for product_type in _product_types():
+        key = _query_key(product_type)
+        if key and key not in table["product_types"]:
+            table["product_types"][key] = product_type
+            table["records"][product_type] = generator.generate(product_type)
+    return table
+
+
+def bundle_segment() -> tuple:
+    """(content digest, payload, rows) of a freshly built table, for bundle.py's extra bundle segment."""
+    table = build_design_systems()
+    return _inputs_digest(_table_inputs()), {"table": table}, len(table["records"])
+
+
+def _load_table(build: bool = False, rebuild: bool = False):
+    """(table or None, origin) for load_design_systems; origin is "memory", "cache", "bundle" or "built"."""
+    files = _table_inputs()
+    version = _inputs_version(files)
+    with _TABLE_LOCK:
+        if "table" in _TABLE and _TABLE["inputs"] == version and not rebuild and (_TABLE["table"] or not build):
+            return _TABLE["table"], "memory"
+
+        ref_path = _ref_path(DATA_DIR / "design-systems", _TABLE_CONFIG) if CACHE_DIR else None
+        ref = _read_cache(ref_path) if ref_path else None
+        entry = None
+        if ref and not rebuild and ref["sources_version"] == version:
+            entry = _read_cache(CACHE_DIR / "objects" / ref["object"])
+        origin = "cache"
+        if entry is None:
+            digest = _inputs_digest(files)
+            object_path = _object_path(digest, _TABLE_CONFIG) if CACHE_DIR else None
+            entry = _read_cache(object_path) if object_path and not rebuild else None
+            if entry is None:
+                bundled = None if rebuild else _read_bundle_segment(TABLE_BUNDLE_KEY, digest)
+                if bundled:
+                    entry, origin = {"version": INDEX_VERSION, "table": bundled["table"]}, "bundle"
+                elif build or rebuild:
+                    entry, origin = {"version": INDEX_VERSION, "table": build_design_systems()}, "built"
+                if entry and object_path:
+                    _write_cache(object_path, entry)
+            if entry and ref_path:
+                _write_cache(ref_path, {"version": INDEX_VERSION, "path": str(DATA_DIR.resolve()),
+                                        "sources_version": version, "object": object_path.name})
+                if ref and ref["object"] != object_path.name:
+                    _prune_objects()
+
+        _TABLE.update(inputs=version, table=entry and entry["table"])
+        return _TABLE["table"], origin
+
+
+def load_design_systems(build: bool = False):
+    """The materialized table for the current data files, or None.
+
+    A table held in memory or persisted for the same settings and input sizes
+    and mtimes, or else for the same content (in the cache or the bundle), is
+    reused. Otherwise it is built only when build is true, and then persisted
+    to the cache; the query path never builds it.
+    """
+    return _load_table(build)[0]
+
+
+def materialize_design_systems(rebuild: bool = False) -> dict:
+    """Load or build the table (rebuild: always build); returns a build_indexes-style report."""
+    start = time.perf_counter()
+    table, origin = _load_table(build=True, rebuild=rebuild)
+    return {"source": "design_system", "file": "*", "rows": len(table["records"]), "status": origin,
+            "build_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def _materialized(query: str):
+    """A copy of the materialized design system a query resolves to, or None."""
+    key = _query_key(query)
+    if not key:
+        return None
+    table = load_design_systems()
+    product_type = table and table["product_types"].get(key)
+    return copy.deepcopy(table["records"][product_type]) if product_type else None
+
+
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
 
@@ -451,7 +671,25 @@ def format_markdown(design_system: dict) -> str:
     return "\n".join(lines)
 
 
+def format_design_system(design_system: dict, output_format: str = "ascii") -> str:
+    """Render a design system as "ascii" (default), "markdown" or "json"."""
+    if output_format == "json":
+        return json.dumps(design_system, indent=2, ensure_ascii=False)
+    if output_format == "markdown":
+        return format_markdown(design_system)
+    return format_ascii_box(design_system)
+
+
 # ============ MAIN ENTRY POINT ============
+def _design_system(query: str, project_name: str = None) -> dict:
+    """The materialized design system of a query, else a freshly generated one."""
+    design_system = _materialized(query)
+    if design_system is None:
+        return _generator().generate(query, project_name)
+    design_system["project_name"] = project_name or query.upper()
+    return design_system
+
+
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii") -> str:
     """
     Main entry point for design system generation.
@@ -459,17 +697,77 @@ def generate_design_system(query: str, project_name: str = None, output_format:
     Args:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
-        output_format: "ascii" (default) or "markdown"
+        output_format: "ascii" (default), "markdown" or "json"
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
-
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    return format_design_system(_design_system(query, project_name), output_format)
+
+
+# ============ BATCH GENERATION ============
+FORMATS = ("ascii", "markdown", "json")
+
+
+def _warm_batch():
+    """Load the indexes, generator and materialized table every brief of a batch shares."""
+    for domain in SEARCH_CONFIG:
+        filepath = DATA_DIR / CSV_CONFIG[domain]["file"]
+        if filepath.exists():
+            _load_index(filepath, CSV_CONFIG[domain])
+    _generator()
+    load_design_systems()
+
+
+def _generate_brief(line: int, brief, output_format: str) -> dict:
+    """Worker of generate_design_systems: the result record of one brief."""
+    spec = brief if isinstance(brief, dict) else {"query": brief}
+    record = {"line": line, **({"id": spec["id"]} if "id" in spec else {})}
+    query = str(spec.get("query") or "").strip()
+    record_format = spec.get("format") or output_format
+    if not query:
+        return {**record, "error": "Brief must have a 'query'"}
+    if record_format not in FORMATS:
+        return {**record, "error": f"Unknown format {record_format!r} (choose from {', '.join(FORMATS)})"}
+    try:
+        design_system = _design_system(query, spec.get("project_name") or None)
+    except Exception as e:
+        return {**record, "error": f"{type(e).__name__}: {e}"}
+    return {**record, "query": query, "format": record_format,
+            "design_system": design_system if record_format == "json" else format_design_system(design_system, record_format)}
+
+
+def generate_design_systems(briefs, output_format: str = "ascii", workers: int = None):
+    """Generate the design system of every brief, yielding each result as soon as it is ready.
+
+    A brief is a query string or a dict with "query" and optional "project_name",
+    "format" (default output_format) and "id" (echoed back). Each result is a dict
+    with the brief's 1-based "line", "query", "format" and "design_system" (the
+    formatted text, or the design system dict for "json"), or "line" and "error".
+
+    The indexes, the generator and the materialized table are loaded once and
+    shared by the whole batch. With more than one worker (default: one per CPU)
+    the briefs are spread over worker processes and yielded in completion order;
+    otherwise they are generated in-process, in input order.
+    """
+    briefs = list(briefs)
+    workers = min(workers or os.cpu_count() or 1, len(briefs))
+    _warm_batch()
+    if workers <= 1:
+        for line, brief in enumerate(briefs, 1):
+            yield _generate_brief(line, brief, output_format)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    # Each worker warms up in its initializer, whatever the start method
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_batch)
+    try:
+        futures = [pool.submit(_generate_brief, line, brief, output_format) for line, brief in enumerate(briefs, 1)]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
 
 
 # ============ CLI SUPPORT ============
@@ -479,7 +777,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate Design System")
     parser.add_argument("query", help="Search query (e.g., 'SaaS dashboard')")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="ascii", help="Output format")
 
     args = parser.parse_args()
 
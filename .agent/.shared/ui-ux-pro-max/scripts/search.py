@@ -2,16 +2,45 @@
 # -*- coding: utf-8 -*-
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
-Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3] [--profile]
        python search.py "<query>" --design-system [-p "Project Name"]
+       python search.py --batch queries.jsonl [--domain <domain>] [--json]
+       python search.py --batch briefs.csv --design-system [-f markdown] [--workers N] [--json]
+       python search.py --serve [--socket PATH | --stdio] [--watch [SECONDS]]
+       python search.py --build-indexes [--workers N] [--rebuild] [--json]
 
-Domains: style, prompt, color, chart, landing, product, ux, typography
+Domains: style, prompt, color, chart, landing, product, ux, typography (all: every domain and stack at once)
 Stacks: html-tailwind, react, nextjs
+
+Queries go to a running --serve process when one is listening, otherwise they
+are answered in-process (--local forces in-process search); core and the
+indexes are only imported on that in-process path. --profile prints the
+result as JSON with stage timings, index sizes and per-term score contributions.
+--batch --design-system generates one design system per brief (query,
+project_name, format) across worker processes, printing each as soon as it is ready.
+--build-indexes fits every index into the on-disk cache in parallel and
+materializes the design system of every product type, e.g. to pre-warm an image
+or CI job.
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system
+import csv
+import json
+import sys
+import time
+from client import SOCKET_PATH, request_server
+
+
+def _format_rows(output, rows):
+    """Append one section per result row"""
+    for i, row in enumerate(rows, 1):
+        output.append(f"### Result {i}")
+        for key, value in row.items():
+            value_str = str(value)
+            if len(value_str) > 300:
+                value_str = value_str[:300] + "..."
+            output.append(f"- **{key}:** {value_str}")
+        output.append("")
 
 
 def format_output(result):
@@ -20,6 +49,14 @@ def format_output(result):
         return f"Error: {result['error']}"
 
     output = []
+    if "groups" in result:
+        output.append(f"## UI Pro Max Search Results (all domains)")
+        output.append(f"**Query:** {result['query']} | **Found:** {result['count']} results in {len(result['groups'])} sources\n")
+        for name, group in result["groups"].items():
+            output.append(f"## {name} ({group['file']})\n")
+            _format_rows(output, group["results"])
+        return "\n".join(output)
+
     if result.get("stack"):
         output.append(f"## UI Pro Max Stack Guidelines")
         output.append(f"**Stack:** {result['stack']} | **Query:** {result['query']}")
@@ -27,50 +64,151 @@ def format_output(result):
         output.append(f"## UI Pro Max Search Results")
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
     output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
-
-    for i, row in enumerate(result['results'], 1):
-        output.append(f"### Result {i}")
-        for key, value in row.items():
-            value_str = str(value)
-            if len(value_str) > 300:
-                value_str = value_str[:300] + "..."
-            output.append(f"- **{key}:** {value_str}")
-        output.append("")
+    _format_rows(output, result['results'])
 
     return "\n".join(output)
 
 
+def _int_max_results(request):
+    """A request object with a numeric-string max_results made an int; other values are left to search_many"""
+    value = request.get("max_results") if isinstance(request, dict) else None
+    if isinstance(value, str):
+        return {**request, "max_results": int(value)}
+    return request
+
+
+def load_batch(path):
+    """Read a JSONL batch ("-" for stdin): one query string or request object per line.
+
+    A .csv file is read as one request object per row, its header naming the keys.
+    A max_results given as a string (always, in a CSV) is converted to an int.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = [{key: value for key, value in row.items() if key and value} for row in csv.DictReader(f)]
+        try:
+            return [_int_max_results(row) for row in rows]
+        except ValueError as e:
+            raise SystemExit(f"Error: {path}: max_results: {e}")
+    stream = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+    with stream:
+        lines = [line for line in stream if line.strip()]
+    queries = []
+    for number, line in enumerate(lines, 1):
+        try:
+            queries.append(_int_max_results(json.loads(line)))
+        except json.JSONDecodeError as e:
+            raise SystemExit(f"Error: {path} line {number}: {e}")
+        except ValueError as e:
+            raise SystemExit(f"Error: {path} line {number}: max_results: {e}")
+    return queries
+
+
+def check_choices(parser, args):
+    """Reject an unknown --domain, --stack or --engine (imports core, so only in-process paths check here)"""
+    from core import ALL_DOMAINS, AVAILABLE_STACKS, CSV_CONFIG, ENGINES
+    for option, value, choices in (("--domain", args.domain, [*CSV_CONFIG, ALL_DOMAINS]),
+                                   ("--stack", args.stack, AVAILABLE_STACKS), ("--engine", args.engine, ENGINES)):
+        if value is not None and value not in choices:
+            parser.error(f"argument {option}: invalid choice: {value!r} (choose from {', '.join(choices)})")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
-    parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("query", nargs="?", help='Search query; "quoted phrases" must match verbatim')
+    parser.add_argument("--domain", "-d", help="Search domain, e.g. style, color, ux ('all' searches every domain and stack)")
+    parser.add_argument("--stack", "-s", help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("--max-results", "-n", type=int, default=None, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--engine", "-e", default="python", help="Scoring backend: python or numpy (needs NumPy installed)")
+    parser.add_argument("--profile", action="store_true", help="Output JSON with stage timings and per-term score contributions")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
+    parser.add_argument("--format", "-f", choices=["ascii", "markdown", "json"], default="ascii", help="Output format for design system")
+    # Batch mode
+    parser.add_argument("--batch", "-b", type=str, metavar="FILE", help="Run every query in a JSONL or CSV file ('-' for stdin); with --design-system, one design system per row")
+    # Server mode
+    parser.add_argument("--serve", action="store_true", help="Keep all indexes warm and answer JSON-lines requests")
+    parser.add_argument("--stdio", action="store_true", help="With --serve: read requests from stdin instead of a socket")
+    parser.add_argument("--socket", type=str, default=SOCKET_PATH, help="Unix socket path for --serve and for clients")
+    parser.add_argument("--watch", type=float, nargs="?", const=1.0, metavar="SECONDS",
+                        help="With --serve: poll the data CSVs (default every 1s) and apply edits to the warm indexes")
+    parser.add_argument("--local", action="store_true", help="Search in-process even if a server is running")
+    # Index cache
+    parser.add_argument("--build-indexes", action="store_true", help="Fit every index into the on-disk cache in parallel and materialize design systems")
+    parser.add_argument("--workers", type=int, default=None, help="With --build-indexes or --batch --design-system: worker processes (default: CPUs)")
+    parser.add_argument("--rebuild", action="store_true", help="With --build-indexes: refit indexes that are already cached")
 
     args = parser.parse_args()
+    if args.max_results is not None and args.max_results < 0:
+        parser.error("argument --max-results/-n: must not be negative")
 
+    if args.serve:
+        from server import serve_socket, serve_stdio
+        if args.stdio:
+            serve_stdio(args.watch)
+        else:
+            serve_socket(args.socket, args.watch)
+        raise SystemExit(0)
+    if args.build_indexes:
+        from core import build_indexes
+        start = time.perf_counter()
+        try:
+            report = build_indexes(args.workers, args.rebuild)
+        except RuntimeError as e:
+            raise SystemExit(f"Error: {e}")
+        from design_system import materialize_design_systems
+        report.append(materialize_design_systems(args.rebuild))
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            for item in report:
+                print(f"{item['source']:20} {item['rows']:6} rows {item['status']:6} {item['build_ms']:9.2f} ms")
+            print(f"Built {len(report)} indexes in {(time.perf_counter() - start) * 1000:.0f} ms")
+        raise SystemExit(0)
+    if args.batch and args.design_system:
+        from design_system import generate_design_systems
+        for record in generate_design_systems(load_batch(args.batch), args.format, args.workers):
+            if args.json or record.get("format") == "json":
+                print(json.dumps(record, ensure_ascii=False))
+            elif "error" in record:
+                print(f"Error: {args.batch} line {record['line']}: {record['error']}", file=sys.stderr)
+            else:
+                print(record["design_system"] + "\n")
+            sys.stdout.flush()
+        raise SystemExit(0)
+    if args.batch:
+        check_choices(parser, args)
+        from core import MAX_RESULTS, search_many
+        max_results = MAX_RESULTS if args.max_results is None else args.max_results
+        for result in search_many(load_batch(args.batch), args.domain, max_results, args.engine):
+            print(json.dumps(result, ensure_ascii=False) if args.json else format_output(result))
+        raise SystemExit(0)
+    if not args.query:
+        parser.error("the query argument is required")
+
+    request = {"query": args.query, "engine": args.engine, "explain": args.profile}
+    if args.max_results is not None:
+        request["max_results"] = args.max_results
     # Design system takes priority
     if args.design_system:
-        result = generate_design_system(args.query, args.project_name, args.format)
-        print(result)
+        request.update(design_system=True, project_name=args.project_name, format=args.format)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        request["stack"] = args.stack
     # Domain search
+    elif args.domain:
+        request["domain"] = args.domain
+
+    result = None if args.local else request_server(request, args.socket)
+    if result is None:
+        check_choices(parser, args)
+        from server import handle_request
+        result = handle_request(request)
+    if args.design_system and "design_system" in result:
+        print(result["design_system"])
+    elif args.json or args.profile:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        print(format_output(result))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Server - keeps every search index warm and answers JSON-lines requests
+over stdin/stdout or a Unix domain socket.
+
+Usage:
+    python search.py --serve [--socket PATH]    # Unix socket (default path below)
+    python search.py --serve --stdio            # one JSON request per stdin line
+    python search.py --serve --watch [SECONDS]  # also apply CSV edits to the warm indexes
+
+Request:  {"id": 1, "query": "glassmorphism", "domain": "style", "max_results": 3, "engine": "numpy"}
+          {"query": "form", "stack": "html-tailwind"}
+          {"query": "glass card", "domain": "style", "explain": true}
+          {"query": "fintech crypto", "design_system": true, "project_name": "X", "format": "markdown"}
+          {"cache_stats": true}
+Response: the search()/search_stack() result dict (with its "profile" when explain is set),
+          {"design_system": "<formatted text>"} or RESULT_CACHE.stats(), with "id" echoed back when given.
+"""
+
+import json
+import os
+import sys
+
+from client import SOCKET_PATH, _connect, _is_private, request_server
+from core import (ALL_DOMAINS, CSV_CONFIG, ENGINES, MAX_RESULTS, RESULT_CACHE, search, search_stack, warm_indexes,
+                  watch_indexes)
+
+
+# ============ REQUEST HANDLING ============
+def handle_request(request: dict) -> dict:
+    """Answer one decoded request with the same dicts the in-process API returns."""
+    if isinstance(request, dict) and request.get("cache_stats"):
+        response = RESULT_CACHE.stats()
+    elif not isinstance(request, dict) or not request.get("query"):
+        response = {"error": "Request must be a JSON object with a 'query'"}
+    elif request.get("design_system"):
+        from design_system import generate_design_system
+        response = {"design_system": generate_design_system(
+            request["query"], request.get("project_name"), request.get("format", "ascii"))}
+    elif request.get("domain") and request["domain"] not in CSV_CONFIG and request["domain"] != ALL_DOMAINS:
+        response = {"error": f"Unknown domain: {request['domain']}. Available: {', '.join([*CSV_CONFIG, ALL_DOMAINS])}"}
+    elif request.get("engine", "python") not in ENGINES:
+        response = {"error": f"Unknown engine: {request['engine']}. Available: {', '.join(ENGINES)}"}
+    elif request.get("stack"):
+        response = search_stack(request["query"], request["stack"], request.get("max_results", MAX_RESULTS),
+                                request.get("engine", "python"), bool(request.get("explain")))
+    else:
+        response = search(request["query"], request.get("domain"), request.get("max_results", MAX_RESULTS),
+                          request.get("engine", "python"), bool(request.get("explain")))
+
+    if isinstance(request, dict) and "id" in request:
+        response = {**response, "id": request["id"]}
+    return response
+
+
+def _handle_line(line: str) -> str:
+    """Decode a request line and encode its response line."""
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return json.dumps({"error": f"Invalid JSON: {e}"})
+    try:
+        response = handle_request(request)
+    except Exception as e:
+        response = {"error": f"{type(e).__name__}: {e}"}
+    return json.dumps(response, ensure_ascii=False)
+
+
+# ============ SERVERS ============
+def _start_watch(interval):
+    """Apply CSV edits to the warm indexes from a background thread."""
+    if interval is None:
+        return
+    import threading
+    log = lambda message: print(f"UI Pro Max server: {message}", file=sys.stderr)  # noqa: E731
+    threading.Thread(target=watch_indexes, args=(interval,), kwargs={"log": log}, daemon=True).start()
+
+
+def serve_stdio(watch: float = None):
+    """Answer newline-delimited JSON requests from stdin until EOF; watch polls the CSVs every watch seconds."""
+    warm_indexes()
+    _start_watch(watch)
+    for line in sys.stdin:
+        if line.strip():
+            sys.stdout.write(_handle_line(line) + "\n")
+            sys.stdout.flush()
+
+
+def _serve_stream(rfile, wfile):
+    """Answer JSON-lines requests from one client connection until it closes."""
+    for raw in rfile:
+        line = raw.decode("utf-8")
+        if line.strip():
+            wfile.write((_handle_line(line) + "\n").encode("utf-8"))
+            wfile.flush()
+
+
+def serve_socket(path: str = SOCKET_PATH, watch: float = None):
+    """Serve on a Unix domain socket until interrupted; watch polls the CSVs every watch seconds."""
+    # Imported here so that in-process queries, which only need handle_request, skip them
+    import signal
+    import socket
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            _serve_stream(self.rfile, self.wfile)
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("Unix domain sockets are not available on this platform; use --stdio")
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not _is_private(directory):
+        raise SystemExit(f"Refusing to serve from {directory}: it must be owned by you and not writable by others")
+    if os.path.lexists(path):
+        if not _is_private(path):
+            raise SystemExit(f"Refusing to replace {path}: it is not owned by you")
+        probe = _connect(path, 0.5)
+        if probe is not None:
+            probe.close()
+            raise SystemExit(f"A server is already listening on {path}")
+        os.unlink(path)
+
+    loaded = warm_indexes()
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    os.chmod(path, 0o600)
+    server.daemon_threads = True
+    print(f"UI Pro Max server: {loaded} indexes warm, listening on {path}", file=sys.stderr)
+    _start_watch(watch)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+# ============ CLIENT ============
+def query(request: dict, path: str = SOCKET_PATH) -> dict:
+    """Answer a request through the server when one is running, otherwise in-process."""
+    response = request_server(request, path)
+    return response if response is not None else handle_request(request)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Checks of the warm-index server's request handling, in-process and over a Unix socket.
+
+Usage: python -m pytest -q test_server.py
+"""
+
+import json
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import core
+import server
+from client import request_server
+
+
+def test_search_requests_match_the_api():
+    assert server.handle_request({"query": "glassmorphism", "domain": "style"}) == core.search("glassmorphism", "style")
+    assert server.handle_request({"query": "form", "stack": "html-tailwind", "max_results": 2}) \
+        == core.search_stack("form", "html-tailwind", 2)
+    assert server.handle_request({"query": "glass card", "domain": "all"}) == core.search("glass card", core.ALL_DOMAINS)
+    explained = server.handle_request({"query": "glass card", "domain": "style", "explain": True})
+    assert explained["results"] == core.search("glass card", "style")["results"]
+    assert "profile" in explained
+
+
+def test_id_is_echoed():
+    assert server.handle_request({"id": 7, "query": "navbar", "domain": "ux"})["id"] == 7
+    assert server.handle_request({"id": "a", "query": ""}) == {
+        "error": "Request must be a JSON object with a 'query'", "id": "a"}
+    assert server.handle_request({"id": None, "cache_stats": True})["id"] is None
+
+
+@pytest.mark.parametrize("request_, error", [
+    ({}, "Request must be a JSON object with a 'query'"),
+    (["navbar"], "Request must be a JSON object with a 'query'"),
+    ({"query": "navbar", "domain": "nope"}, "Unknown domain: nope."),
+    ({"query": "navbar", "engine": "nope"}, "Unknown engine: nope."),
+])
+def test_invalid_requests_get_an_error(request_, error):
+    assert server.handle_request(request_)["error"].startswith(error)
+
+
+def test_design_system_request():
+    response = server.handle_request({"query": "fintech crypto", "design_system": True, "project_name": "Ledger",
+                                      "format": "markdown"})
+    assert set(response) == {"design_system"}
+    assert "Ledger" in response["design_system"]
+
+
+def test_lines_always_get_a_json_response():
+    assert json.loads(server._handle_line("{not json"))["error"].startswith("Invalid JSON")
+    assert json.loads(server._handle_line('{"query": "navbar", "stack": "nope"}')) \
+        == server.handle_request({"query": "navbar", "stack": "nope"})
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets are not available")
+def test_socket_round_trip(tmp_path):
+    path = str(tmp_path / "server.sock")
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            server._serve_stream(self.rfile, self.wfile)
+
+    listener = socketserver.ThreadingUnixStreamServer(path, Handler)
+    thread = threading.Thread(target=listener.serve_forever, daemon=True)
+    thread.start()
+    try:
+        request = {"id": 1, "query": "glassmorphism", "domain": "style"}
+        assert request_server(request, path) == server.handle_request(request)
+        assert server.query({"query": "navbar", "domain": "nope"}, path)["error"].startswith("Unknown domain")
+    finally:
+        listener.shutdown()
+        listener.server_close()
+    assert request_server(request, str(tmp_path / "missing.sock")) is None
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets are not available")
+def test_serve_socket(tmp_path):
+    path = str(tmp_path / "server.sock")
+    search_py = Path(__file__).with_name("search.py")
+    process = subprocess.Popen([sys.executable, str(search_py), "--serve", "--socket", path], stderr=subprocess.PIPE)
+    try:
+        deadline = time.monotonic() + 30
+        while request_server({"cache_stats": True}, path) is None:
+            assert process.poll() is None, process.stderr.read()
+            assert time.monotonic() < deadline, "server did not start"
+            time.sleep(0.05)
+        request = {"id": 2, "query": "navbar", "domain": "landing"}
+        assert request_server(request, path) == server.handle_request(request)
+    finally:
+        process.terminate()
+        process.wait(10)
+        process.stderr.close()
+    assert not Path(path).exists()
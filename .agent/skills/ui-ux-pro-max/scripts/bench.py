@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Bench - latency, throughput and peak memory of search, search_stack
+and generate_design_system, on the real data and on synthetic corpora scaled from it.
+
+Usage: python bench.py [--scales 1,10,100,1000] [--targets style,stack:react,all,design_system]
+                       [--engines python,numpy] [--queries 20] [--repeat 3] [--timeout 300]
+                       [--output results.json] [--compare baseline.json] [--json]
+
+Scale N writes N x the rows of every CSV under --corpus-dir, keeping the real schemas
+and resampling each column's vocabulary (plus some scale-specific new terms). cold_ms is
+the wall time of a search.py process answering one query with an empty on-disk cache
+(interpreter start-up, imports, CSV parsing and index fitting), warm_start_ms that of a
+second process reusing the cache the first one wrote. The in-process metrics of every
+(scale, target) pair then run in a fresh process with the on-disk index cache and the
+result cache disabled, and peak memory is that process's maximum RSS. A target that
+fails or exceeds --timeout is recorded with an "error" instead of metrics.
+
+Results are JSON; --compare lists the metrics that got worse than an earlier run by
+more than --threshold and exits with status 1 when there are any.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from core import CSV_CONFIG, AVAILABLE_STACKS, ALL_DOMAINS, DATA_DIR, HAS_NUMPY, MAX_RESULTS
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak memory is then omitted
+    resource = None
+
+
+# ============ CONFIGURATION ============
+DESIGN_SYSTEM = "design_system"
+DEFAULT_TARGETS = list(CSV_CONFIG) + [f"stack:{AVAILABLE_STACKS[0]}", ALL_DOMAINS, DESIGN_SYSTEM]
+DEFAULT_SCALES = "1,10,100"
+CORPUS_DIR = Path(tempfile.gettempdir()) / "ui-ux-pro-max-bench"
+SEARCH_SCRIPT = Path(__file__).with_name("search.py")
+SEED = 1729
+COLD_QUERY = "modern saas dashboard"
+
+# Share of words replaced by another word of the same column, and of words given a
+# scale-specific suffix (new vocabulary, as a larger real catalog would bring)
+RESAMPLE_RATE = 0.25
+NEW_TERM_RATE = 0.05
+
+# Lower is better for these metrics, higher for the rest
+LOWER_IS_BETTER = ("cold_ms", "warm_start_ms", "first_ms", "warm_p50_ms", "warm_p95_ms", "peak_rss_mb")
+HIGHER_IS_BETTER = ("qps", "batch_qps")
+
+
+# ============ SYNTHETIC CORPUS ============
+def _source_csvs():
+    """Every CSV of the real data directory, relative to it"""
+    return sorted(path.relative_to(DATA_DIR) for path in DATA_DIR.rglob("*.csv"))
+
+
+def _scaled_rows(rows, fieldnames, scale, rng):
+    """The real rows followed by scale - 1 resampled copies"""
+    pools = {col: [word for row in rows for word in (row.get(col) or "").split()] for col in fieldnames}
+    yield from rows
+    for copy in range(1, scale):
+        for i, row in enumerate(rows):
+            scaled = {}
+            for col in fieldnames:
+                value = row.get(col) or ""
+                if value.isdigit():
+                    scaled[col] = str(copy * len(rows) + i + 1)  # keep numeric ids unique
+                    continue
+                words = []
+                for word in value.split():
+                    roll = rng.random()
+                    if roll < RESAMPLE_RATE:
+                        word = rng.choice(pools[col])
+                    elif roll < RESAMPLE_RATE + NEW_TERM_RATE:
+                        word = f"{word}{copy:x}"
+                    words.append(word)
+                scaled[col] = " ".join(words)
+            yield scaled
+
+
+def build_corpus(scale, corpus_dir=CORPUS_DIR):
+    """Write (or reuse) the scale x corpus and return its data directory"""
+    digest = hashlib.sha256(f"{scale}:{SEED}:{RESAMPLE_RATE}:{NEW_TERM_RATE}".encode("utf-8"))
+    for relpath in _source_csvs():
+        digest.update(str(relpath).encode("utf-8"))
+        digest.update((DATA_DIR / relpath).read_bytes())
+    target = Path(corpus_dir) / f"x{scale}-{digest.hexdigest()[:12]}"
+    if (target / ".complete").exists():
+        return target
+
+    rng = random.Random(SEED)
+    for relpath in _source_csvs():
+        with open(DATA_DIR / relpath, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            fieldnames, rows = reader.fieldnames or [], list(reader)
+        out = target / relpath
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(_scaled_rows(rows, fieldnames, scale, rng))
+    (target / ".complete").touch()
+    return target
+
+
+# ============ MEASUREMENT (runs in a fresh process) ============
+def _rss_mb():
+    """Peak resident set size of this process so far, in MiB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def _sample_queries(stores, cols, count, seed=SEED):
+    """Deterministic 1-3 word queries drawn from the indexed columns of RowStores"""
+    from core import BM25
+    rng = random.Random(seed)
+    tokenize = BM25().tokenize
+    stores = [store for store in stores if len(store)]
+    queries = []
+    while stores and len(queries) < count:
+        store = rng.choice(stores)
+        row = rng.randrange(len(store))
+        tokens = tokenize(" ".join(str(store.get(row, col, "")) for col in cols))
+        if tokens:
+            queries.append(" ".join(rng.sample(tokens, min(len(tokens), rng.randint(1, 3)))))
+    return queries
+
+
+def _latencies(call, queries, engine, repeat):
+    return [_timed(call, query, engine) for _ in range(repeat) for query in queries]
+
+
+def measure(spec):
+    """Cold/warm latency, throughput and peak memory for one target in this process"""
+    import core
+
+    target, count, repeat = spec["target"], spec["queries"], spec["repeat"]
+    base_rss = _rss_mb()
+
+    if target == DESIGN_SYSTEM:
+        from design_system import generate_design_system
+        call = lambda query, engine: generate_design_system(query)  # noqa: E731
+        batch = None
+        engines = ["python"]
+        filepath, config = DATA_DIR / CSV_CONFIG["product"]["file"], CSV_CONFIG["product"]
+    elif target.startswith("stack:"):
+        stack = target.split(":", 1)[1]
+        _, filepath, config = core._source(None, stack)
+        call = lambda query, engine: core.search_stack(query, stack, MAX_RESULTS, engine)  # noqa: E731
+        batch = lambda engine: core.search_many([{"query": q, "stack": stack} for q in queries],  # noqa: E731
+                                                engine=engine)
+        engines = spec["engines"]
+    else:
+        call = lambda query, engine: core.search(query, target, MAX_RESULTS, engine)  # noqa: E731
+        batch = lambda engine: core.search_many(queries, target, MAX_RESULTS, engine)  # noqa: E731
+        engines = spec["engines"]
+        if target != ALL_DOMAINS:
+            _, filepath, config = core._source(target)
+
+    # Parse the CSVs and fit the indexes (cold start is timed by the runner, across processes)
+    call(COLD_QUERY, "python")
+    if target == ALL_DOMAINS:
+        combined = core._load_combined_index()
+        stores, bm25 = combined["rows"], combined["bm25"]
+        cols = sorted({col for _, _, config in core._all_sources() for col in config["search_cols"]})
+    else:
+        rows, bm25 = core._load_index(filepath, config)
+        stores, cols = [rows], config["search_cols"]
+    queries = _sample_queries(stores, cols, count)
+
+    results = []
+    for engine in engines:
+        first_ms = _timed(call, queries[0], engine)
+        latencies = sorted(_latencies(call, queries, engine, repeat))
+        batch_ms = min(_timed(batch, engine) for _ in range(repeat)) if batch else None
+        results.append({
+            "target": target,
+            "engine": engine,
+            "rows": bm25.N,
+            "vocab": len(bm25.vocab),
+            "first_ms": round(first_ms, 3),
+            "warm_p50_ms": round(statistics.median(latencies), 3),
+            "warm_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "qps": round(len(latencies) / (sum(latencies) / 1000), 1),
+            "batch_qps": round(len(queries) / (batch_ms / 1000), 1) if batch_ms else None,
+            "base_rss_mb": base_rss,
+            "peak_rss_mb": _rss_mb()
+        })
+    return results
+
+
+# ============ PROCESS START-UP ============
+def _cli_args(target):
+    """search.py arguments sending COLD_QUERY to a target"""
+    if target == DESIGN_SYSTEM:
+        return ["--design-system"]
+    if target.startswith("stack:"):
+        return ["--stack", target.split(":", 1)[1]]
+    return ["--domain", target]
+
+
+def time_cli(target, data_dir, timeout):
+    """Wall time (ms) of a search.py process with an empty on-disk cache, then of one reusing that cache"""
+    with tempfile.TemporaryDirectory(prefix="ui-ux-pro-max-bench-cache-") as cache_dir:
+        env = {**os.environ, "UIPRO_DATA_DIR": str(data_dir), "UIPRO_CACHE_DIR": cache_dir, "UIPRO_RESULT_CACHE": "0"}
+        env.pop("UIPRO_NO_CACHE", None)
+        command = [sys.executable, str(SEARCH_SCRIPT), COLD_QUERY, *_cli_args(target), "--local"]
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            subprocess.run(command, env=env, capture_output=True, text=True, check=True, timeout=timeout)
+            timings.append(round((time.perf_counter() - start) * 1000, 3))
+    return timings
+
+
+# ============ RUNNER ============
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, targets, engines, queries, repeat, timeout, corpus_dir=CORPUS_DIR, log=sys.stderr):
+    """Benchmark every (scale, target) pair in its own process; returns the results document"""
+    results = []
+    for scale in scales:
+        start = time.perf_counter()
+        data_dir = build_corpus(scale, corpus_dir)
+        print(f"x{scale}: corpus ready in {time.perf_counter() - start:.1f}s at {data_dir}", file=log)
+
+        env = {**os.environ, "UIPRO_DATA_DIR": str(data_dir), "UIPRO_NO_CACHE": "1", "UIPRO_RESULT_CACHE": "0"}
+        for target in targets:
+            spec = {"target": target, "engines": engines, "queries": queries, "repeat": repeat}
+            try:
+                cold_ms, warm_start_ms = time_cli(target, data_dir, timeout)
+                proc = subprocess.run([sys.executable, __file__, "--worker", json.dumps(spec)], env=env,
+                                      capture_output=True, text=True, timeout=timeout)
+                if proc.returncode:
+                    error = (proc.stderr.strip().splitlines() or [f"exit status {proc.returncode}"])[-1]
+                    records = [{"target": target, "error": error}]
+                else:
+                    records = [{**record, "cold_ms": cold_ms, "warm_start_ms": warm_start_ms}
+                               for record in json.loads(proc.stdout)]
+            except subprocess.CalledProcessError as e:
+                error = (e.stderr.strip().splitlines() or [f"exit status {e.returncode}"])[-1]
+                records = [{"target": target, "error": f"search.py: {error}"}]
+            except subprocess.TimeoutExpired:
+                records = [{"target": target, "error": f"timeout after {timeout}s"}]
+
+            for record in records:
+                record["scale"] = scale
+                results.append(record)
+                print(f"x{scale} " + _format_record(record), file=log)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": HAS_NUMPY,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "queries": queries,
+            "repeat": repeat
+        },
+        "results": results
+    }
+
+
+def _format_record(record):
+    if "error" in record:
+        return f"{record['target']:<20} ERROR {record['error']}"
+    batch = f"{record['batch_qps']:>9}" if record["batch_qps"] is not None else f"{'-':>9}"
+    return (f"{record['target']:<20} {record['engine']:<6} rows={record['rows']:<8} "
+            f"cold={record['cold_ms']:>9.1f}ms warm_start={record['warm_start_ms']:>8.1f}ms "
+            f"p50={record['warm_p50_ms']:>8.3f}ms p95={record['warm_p95_ms']:>8.3f}ms "
+            f"qps={record['qps']:>9} batch_qps={batch} "
+            f"rss={record['peak_rss_mb']}MiB")
+
+
+# ============ COMPARISON ============
+def _key(record):
+    return record["target"], record.get("scale"), record.get("engine")
+
+
+def compare(baseline, current, threshold):
+    """(key, metric, old, new, change) for every metric that got worse by more than threshold"""
+    old_records = {_key(record): record for record in baseline["results"] if "error" not in record}
+    regressions = []
+    for record in current["results"]:
+        old = old_records.get(_key(record))
+        if old is None:
+            continue
+        if "error" in record:
+            regressions.append((_key(record), "error", None, record["error"], None))
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            before, after = old.get(metric), record.get(metric)
+            if not before or after is None:
+                continue
+            change = after / before - 1
+            worse = change > threshold if metric in LOWER_IS_BETTER else change < -threshold
+            if worse:
+                regressions.append((_key(record), metric, before, after, change))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark UI Pro Max search")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated corpus scales (1 = real data)")
+    parser.add_argument("--targets", default=",".join(DEFAULT_TARGETS),
+                        help="Comma-separated domains, stack:<name>, all and design_system")
+    parser.add_argument("--engines", default="python,numpy" if HAS_NUMPY else "python", help="Comma-separated engines")
+    parser.add_argument("--queries", type=int, default=20, help="Queries sampled per target")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the queries for warm timings")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds allowed per (scale, target)")
+    parser.add_argument("--corpus-dir", type=Path, default=CORPUS_DIR, help="Where synthetic corpora are written")
+    parser.add_argument("--output", "-o", type=Path, help="Write the JSON results to this file")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative change counted as a regression")
+    parser.add_argument("--json", action="store_true", help="Print the JSON results instead of a summary")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(json.loads(args.worker))))
+        sys.exit(0)
+
+    report = run([int(scale) for scale in args.scales.split(",")], args.targets.split(","),
+                 args.engines.split(","), args.queries, args.repeat, args.timeout, args.corpus_dir)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text(encoding="utf-8")), report, args.threshold)
+        for (target, scale, engine), metric, before, after, change in regressions:
+            delta = f"{change:+.1%}" if change is not None else ""
+            print(f"REGRESSION x{scale} {target} {engine or ''} {metric}: {before} -> {after} {delta}")
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+        sys.exit(1 if regressions else 0)
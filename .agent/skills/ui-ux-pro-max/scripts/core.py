@@ -2,72 +2,168 @@
 # -*- coding: utf-8 -*-
 """
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
+
+CSVs are read from DATA_DIR (override with UIPRO_DATA_DIR, e.g. for a larger catalog).
+Fitted indexes are persisted under CACHE_DIR (override with UIPRO_CACHE_DIR,
+disable with UIPRO_NO_CACHE=1) keyed by the CSV's content, so identical copies of a
+data file share one entry, and reused until the CSV changes; build_indexes() fills
+the cache for every CSV in parallel. A precompiled
+BUNDLE_FILE (built by bundle.py) is used for any CSV whose content it matches.
 """
 
 import csv
+import hashlib
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+import io
+import os
+import pickle
 import re
+import struct
+import time
+from array import array
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import Counter, OrderedDict, defaultdict, deque
+from importlib.util import find_spec
+from _thread import allocate_lock  # threading itself is only needed by watch_indexes
+
+# Optional NumPy backend for engine="numpy", imported on first use to keep CLI startup fast
+HAS_NUMPY = find_spec("numpy") is not None
+np = None
 
 # ============ CONFIGURATION ============
-DATA_DIR = Path(__file__).parent.parent / "data"
+DATA_DIR = Path(os.environ.get("UIPRO_DATA_DIR") or Path(__file__).parent.parent / "data")
 MAX_RESULTS = 3
+ENGINES = ("python", "numpy")
+ALL_DOMAINS = "all"  # search(domain=ALL_DOMAINS) scores every domain and stack in one pass
+
+# On-disk index cache; bump INDEX_VERSION whenever the BM25 layout changes
+CACHE_DIR = None if os.environ.get("UIPRO_NO_CACHE") else Path(
+    os.environ.get("UIPRO_CACHE_DIR")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "ui-ux-pro-max"
+)
+INDEX_VERSION = 11
+
+# Precompiled indexes for every CSV, built at release time by bundle.py
+BUNDLE_FILE = DATA_DIR / "index.bundle"
+BUNDLE_MAGIC = b"UIPRO-BUNDLE\n"
+
+# Process-wide LRU of search results (entries); 0 disables it
+RESULT_CACHE_SIZE = int(os.environ.get("UIPRO_RESULT_CACHE", 1024))
+
+# CSVs of at least STREAM_BUILD_BYTES are read and indexed in a streaming pass that
+# holds at most BUILD_MEMORY bytes of postings before spilling them to disk
+STREAM_BUILD_BYTES = int(os.environ.get("UIPRO_STREAM_BYTES", 16 * 1024 * 1024))
+BUILD_MEMORY = int(os.environ.get("UIPRO_BUILD_MEMORY", 64 * 1024 * 1024))
+
+# Query terms missing from an index match up to FUZZY_CANDIDATES close vocabulary
+# terms (typos or prefixes); each edit scales their score by FUZZY_PENALTY (0 disables).
+# At most FUZZY_VERIFY typo candidates per term have their edit distance computed
+FUZZY_PENALTY = float(os.environ.get("UIPRO_FUZZY_PENALTY", 0.5))
+FUZZY_CANDIDATES = 3
+FUZZY_VERIFY = 64
+
+# Consecutive query terms found within PROXIMITY_WINDOW positions of each other in a
+# row add PROXIMITY_WEIGHT * (smaller IDF) / distance to its score (0 disables); only
+# hits scoring at least the PROXIMITY_RESCORE-th (or top_k-th, if later) best BM25
+# score are rescored this way
+PROXIMITY_WINDOW = 3
+PROXIMITY_WEIGHT = float(os.environ.get("UIPRO_PROXIMITY_WEIGHT", 0.5))
+PROXIMITY_RESCORE = 50
+
+# Indexes of domains with "normalize" (the default) and their queries stem plural
+# words and fold each SYNONYMS group into its first term (see _normalize); the table
+# is part of the index spec, a change to _stem needs an INDEX_VERSION bump
+SYNONYMS = (
+    ("ecommerce", "commerce", "shop", "shopping", "webshop", "eshop"),
+    ("animation", "animate", "animated", "animating"),
+    ("modal", "dialog", "popup"),
+    ("navigation", "nav"),
+    ("button", "btn"),
+    ("image", "img", "picture"),
+    ("accessibility", "a11y"),
+    ("spinner", "loader"),
+    ("icon", "glyph", "pictogram"),
+    ("font", "typeface"),
+    ("crypto", "cryptocurrency"),
+    ("color", "colour"),
+    ("gray", "grey"),
+)
+NORMALIZE_CACHE_SIZE = 65536  # words whose normalized term is memoized
 
+# Indexes already loaded by this process: (path, index spec) -> (size, mtime_ns, rows, bm25),
+# plus the combined all-domain index under (DATA_DIR, ALL_DOMAINS)
+_INDEXES = {}
+
+# search_cols are indexed as BM25F fields; "weights" boosts matches in a column (default 1);
+# "normalize": False indexes (and queries) a domain's words as they are, without stemming or synonyms
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type"],
+        "weights": {"Style Category": 3, "Keywords": 3, "Best For": 2},
         "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity"]
     },
     "prompt": {
         "file": "prompts.csv",
         "search_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords"],
+        "weights": {"Style Category": 3, "AI Prompt Keywords (Copy-Paste Ready)": 2},
         "output_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords", "Implementation Checklist"]
     },
     "color": {
         "file": "colors.csv",
         "search_cols": ["Product Type", "Keywords", "Notes"],
+        "weights": {"Product Type": 3, "Keywords": 3},
         "output_cols": ["Product Type", "Keywords", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Border (Hex)", "Notes"]
     },
     "chart": {
         "file": "charts.csv",
         "search_cols": ["Data Type", "Keywords", "Best Chart Type", "Accessibility Notes"],
+        "weights": {"Data Type": 3, "Keywords": 3, "Best Chart Type": 2},
         "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"]
     },
     "landing": {
         "file": "landing.csv",
         "search_cols": ["Pattern Name", "Keywords", "Conversion Optimization", "Section Order"],
+        "weights": {"Pattern Name": 3, "Keywords": 3},
         "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"]
     },
     "product": {
         "file": "products.csv",
         "search_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Key Considerations"],
+        "weights": {"Product Type": 3, "Keywords": 3, "Primary Style Recommendation": 2},
         "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"]
     },
     "ux": {
         "file": "ux-guidelines.csv",
         "search_cols": ["Category", "Issue", "Description", "Platform"],
+        "weights": {"Category": 2, "Issue": 3},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "typography": {
         "file": "typography.csv",
         "search_cols": ["Font Pairing Name", "Category", "Mood/Style Keywords", "Best For", "Heading Font", "Body Font"],
+        "weights": {"Font Pairing Name": 3, "Mood/Style Keywords": 3, "Best For": 2},
         "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"]
     },
     "icons": {
         "file": "icons.csv",
         "search_cols": ["Category", "Icon Name", "Keywords", "Best For"],
+        "weights": {"Icon Name": 3, "Keywords": 3, "Category": 2},
         "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"]
     },
     "react": {
         "file": "react-performance.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "weights": {"Issue": 3, "Keywords": 3, "Category": 2},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "web": {
         "file": "web-interface.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "weights": {"Issue": 3, "Keywords": 3, "Category": 2},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     }
 }
@@ -89,169 +185,1942 @@ STACK_CONFIG = {
 # Common columns for all stacks
 _STACK_COLS = {
     "search_cols": ["Category", "Guideline", "Description", "Do", "Don't"],
+    "weights": {"Guideline": 3, "Category": 2},
     "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"]
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+# ============ TEXT ANALYSIS ============
+def _stem(word):
+    """Strip a plural ending (a light S-stemmer): categories -> category, classes -> class, charts -> chart.
+
+    Words of up to 3 letters and words ending in -ss, -us or -is are kept, and a
+    stem stems to itself.
+    """
+    if len(word) <= 3 or word[-1] != "s" or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4 and not word.endswith(("aies", "eies")):
+        return word[:-3] + "y"
+    if word.endswith(("sses", "ches", "shes", "xes")):
+        return word[:-2]
+    return word[:-1]
+
+
+_SYNONYM_TERMS = {_stem(word): _stem(group[0]) for group in SYNONYMS for word in group}
+_SYNONYMS_KEY = hashlib.sha1(repr(SYNONYMS).encode("utf-8")).hexdigest()[:8]
+_NORMALIZED = {}
+
+
+def _normalize(word):
+    """The index term of a token: its stem, folded to its synonym group's first term (memoized)"""
+    term = _NORMALIZED.get(word)
+    if term is None:
+        stem = _stem(word)
+        term = _SYNONYM_TERMS.get(stem, stem)
+        if len(_NORMALIZED) < NORMALIZE_CACHE_SIZE:
+            _NORMALIZED[word] = term
+    return term
+
+
+# ============ PROFILING ============
+class _Stopwatch:
+    """Adds the milliseconds between successive lap() calls to timings["<stage>_ms"] (no-op without timings)"""
+
+    def __init__(self, timings=None):
+        self.timings = timings
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        if self.timings is not None:
+            key = f"{stage}_ms"
+            self.timings[key] = self.timings.get(key, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25F ranking over an inverted index; with a single unweighted field this is plain BM25"""
+
+    # Terms are interned to ids (vocab; terms[t] is the word of id t). The postings
+    # of term t are doc_ids/tf_weights[indptr[t]:indptr[t + 1]] in document order,
+    # with idf[t], max_weights[t] bounding its tf weights and block_max[block_ptr[t]:]
+    # bounding each BLOCK of them. Posting p occurs at token positions[pos_indptr[p]:
+    # pos_indptr[p + 1]], counted across fields with a gap of one between them.
+    # The FORWARD_INDEX arrays hold each document's fields, term counts and positions
+    # (doc_keys: a content hash per document) for updated(); pickles leave them out.
+    # gram_* (trigram -> terms, by length) and term_order serve fuzzy matching.
+    BLOCK = 64  # postings per block_max entry
+    FORWARD_INDEX = ("doc_keys", "fwd_docs", "fwd_field", "fwd_length", "fwd_pairs", "fwd_term", "fwd_tf", "fwd_pos",
+                     "fwd_pos_docs")
 
-    def __init__(self, k1=1.5, b=0.75):
+    def __init__(self, k1=1.5, b=0.75, field_weights=None, field_normalize=None):
         self.k1 = k1
         self.b = b
-        self.corpus = []
-        self.doc_lengths = []
+        self.field_weights = tuple(field_weights or ())
+        self.field_normalize = tuple(field_normalize or ())
+        self.normalized = any(self.field_normalize)
+        self.vocab = {}
+        self.indptr = array('Q', [0])
+        self.doc_ids = array('I')
+        self.tf_weights = array('d')
+        self.idf = array('d')
+        self.max_weights = array('d')
+        self.block_ptr = array('Q', [0])
+        self.block_max = array('d')
+        self.pos_indptr = array('Q', [0])
+        self.positions = array('I')
+        self.doc_lengths = array('I')
         self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.avg_field_lengths = {}
         self.N = 0
+        self.doc_keys = array('Q')
+        self.fwd_docs = array('Q', [0])
+        self.fwd_field = array('H')
+        self.fwd_length = array('I')
+        self.fwd_pairs = array('Q', [0])
+        self.fwd_term = array('I')
+        self.fwd_tf = array('I')
+        self.fwd_pos = array('I')
+        self.fwd_pos_docs = array('Q', [0])
+        self.forward_key = None
+        self.terms = []
+        self.gram_ids = {}
+        self.gram_indptr = array('Q', [0])
+        self.gram_terms = array('I')
+        self.term_order = array('I')
+
+    def __getstate__(self):
+        """Pickle without the forward index (see forward_index())"""
+        state = dict(self.__dict__)
+        for name in self.FORWARD_INDEX:
+            state.pop(name, None)
+        return state
+
+    @property
+    def has_forward(self):
+        """Whether the forward index is loaded (an unpickled index has none until attach_forward())"""
+        return "fwd_docs" in self.__dict__
+
+    def forward_index(self):
+        """The forward index arrays and doc_keys, by attribute name"""
+        return {name: getattr(self, name) for name in self.FORWARD_INDEX}
+
+    def attach_forward(self, forward):
+        """Restore a forward_index() of this index"""
+        self.__dict__.update(forward)
+
+    def _forward_key(self):
+        """Hash of what the forward index depends on: document contents, term ids and tokenization"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((self.field_weights, self.field_normalize, self.normalized and _SYNONYMS_KEY)).encode("utf-8"))
+        digest.update(self.doc_keys.tobytes())
+        digest.update("\x00".join(self.terms).encode("utf-8"))
+        return digest.hexdigest()
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
         text = re.sub(r'[^\w\s]', ' ', str(text).lower())
         return [w for w in text.split() if len(w) > 2]
 
-    def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+    def _field_weight(self, field):
+        return self.field_weights[field] if field < len(self.field_weights) else 1.0
+
+    def _parse_fields(self, doc):
+        """(field, (term, positions) pairs, length) of every field a document has"""
+        fields, offset = [], 0
+        for field, text in enumerate([doc] if isinstance(doc, str) else doc):
+            if text is not None:
+                tokens = self.tokenize(text)
+                if field < len(self.field_normalize) and self.field_normalize[field]:
+                    tokens = [_normalize(token) for token in tokens]
+                positions = {}
+                for position, token in enumerate(tokens, offset):
+                    found = positions.get(token)
+                    if found is None:
+                        positions[token] = [position]
+                    else:
+                        found.append(position)
+                fields.append((field, positions.items(), len(tokens)))
+                offset += len(tokens) + 1
+        return fields
+
+    @staticmethod
+    def _doc_key(doc):
+        """64-bit content hash of a document's field texts"""
+        texts = [doc] if isinstance(doc, str) else doc
+        raw = "\x1e".join("\x00" if text is None else text for text in texts).encode("utf-8")
+        return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little")
+
+    def _copy_forward(self, source, doc):
+        """Append document doc of source (an index sharing this vocab's ids) to the forward index"""
+        first, last = source.fwd_docs[doc], source.fwd_docs[doc + 1]
+        start, end = source.fwd_pairs[first], source.fwd_pairs[last]
+        shift = len(self.fwd_term) - start
+        self.fwd_term.extend(source.fwd_term[start:end])
+        self.fwd_tf.extend(source.fwd_tf[start:end])
+        self.fwd_pairs.extend(pair + shift for pair in source.fwd_pairs[first + 1:last + 1])
+        self.fwd_field.extend(source.fwd_field[first:last])
+        self.fwd_length.extend(source.fwd_length[first:last])
+        self.fwd_docs.append(len(self.fwd_field))
+        self.fwd_pos.extend(source.fwd_pos[source.fwd_pos_docs[doc]:source.fwd_pos_docs[doc + 1]])
+        self.fwd_pos_docs.append(len(self.fwd_pos))
+        return zip(source.fwd_field[first:last], source.fwd_length[first:last])
+
+    def _doc_postings(self, doc):
+        """(term id, saturated BM25F tf weight, ascending positions) of each term of an indexed document"""
+        pseudo_tf, positions = {}, {}
+        cursor = self.fwd_pos_docs[doc]
+        for entry in range(self.fwd_docs[doc], self.fwd_docs[doc + 1]):
+            field = self.fwd_field[entry]
+            avg = self.avg_field_lengths[field]
+            norm = 1 - self.b + self.b * self.fwd_length[entry] / avg if avg else 1.0
+            weight = self._field_weight(field)
+            start, end = self.fwd_pairs[entry], self.fwd_pairs[entry + 1]
+            for term, tf in zip(self.fwd_term[start:end], self.fwd_tf[start:end]):
+                pseudo_tf[term] = pseudo_tf.get(term, 0.0) + weight * tf / norm
+                found = positions.get(term)
+                if found is None:
+                    positions[term] = self.fwd_pos[cursor:cursor + tf]
+                else:
+                    found.extend(self.fwd_pos[cursor:cursor + tf])
+                cursor += tf
+        return [(term, tf * (self.k1 + 1) / (tf + self.k1), positions[term])
+                for term, tf in pseudo_tf.items() if tf > 0]
+
+    def _idf(self, freq):
+        return log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+
+    def fit(self, documents, memory_budget=None, reuse=None):
+        """Index documents (strings, or sequences of field texts with None for a missing field).
+
+        Documents reuse holds are copied, not tokenized, and postings beyond
+        memory_budget bytes spill to a temporary file; returns the number tokenized.
+        """
+        reusable = defaultdict(deque)
+        if reuse is not None:
+            self.vocab = dict(reuse.vocab)
+            for doc, key in enumerate(reuse.doc_keys):
+                reusable[key].append(doc)
+
+        vocab = self.vocab
+        field_totals = defaultdict(int)
+        field_docs = defaultdict(int)
+        tokenized = 0
+        for doc in documents:
+            key = self._doc_key(doc)
+            self.doc_keys.append(key)
+            if reusable.get(key):
+                source = reusable[key].popleft()
+                for field, length in self._copy_forward(reuse, source):
+                    field_totals[field] += length
+                    field_docs[field] += 1
+                self.doc_lengths.append(reuse.doc_lengths[source])
+                continue
+
+            tokenized += 1
+            doc_length = 0
+            for field, pairs, length in self._parse_fields(doc):
+                for word, positions in pairs:
+                    term = vocab.get(word)
+                    if term is None:
+                        term = vocab[word] = len(vocab)
+                    self.fwd_term.append(term)
+                    self.fwd_tf.append(len(positions))
+                    self.fwd_pos.extend(positions)
+                self.fwd_pairs.append(len(self.fwd_term))
+                self.fwd_field.append(field)
+                self.fwd_length.append(length)
+                field_totals[field] += length
+                field_docs[field] += 1
+                doc_length += length
+            self.fwd_docs.append(len(self.fwd_field))
+            self.fwd_pos_docs.append(len(self.fwd_pos))
+            self.doc_lengths.append(doc_length)
+
+        self.N = len(self.doc_lengths)
+        self._index_grams()
+        self.forward_key = self._forward_key()
         if self.N == 0:
-            return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
+            return tokenized
         self.avgdl = sum(self.doc_lengths) / self.N
+        self.avg_field_lengths = {field: field_totals[field] / field_docs[field] for field in field_totals}
+        self._invert(memory_budget)
+        return tokenized
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+    def _invert(self, memory_budget=None):
+        """Postings arrays, their positions and the IDF table from the forward index"""
+        doc_freqs = array('Q', [0]) * len(self.vocab)
+        occurrences = array('Q', [0]) * len(self.vocab)
+        spill = None  # temporary file of spilled runs, opened by the first run over memory_budget
+        try:
+            runs, pending, pending_bytes = 0, {}, 0
+            for idx in range(self.N):
+                for term, weight, positions in self._doc_postings(idx):
+                    count = len(positions)
+                    doc_freqs[term] += 1
+                    occurrences[term] += count
+                    run = pending.get(term)
+                    if run is None:
+                        run = pending[term] = (array('I'), array('d'), array('I'), array('I'))
+                        pending_bytes += 320  # four arrays and their dict slot
+                    docs, weights, counts, term_positions = run
+                    docs.append(idx)
+                    weights.append(weight)
+                    counts.append(count)
+                    term_positions.extend(positions)
+                    pending_bytes += 16 + 4 * count
+                if memory_budget is not None and pending_bytes > memory_budget:
+                    if spill is None:
+                        import tempfile  # only spilling builds need it; kept off the query path's import time
+                        spill = tempfile.TemporaryFile()
+                    pickle.dump(pending, spill, protocol=pickle.HIGHEST_PROTOCOL)
+                    runs, pending, pending_bytes = runs + 1, {}, 0
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+            for freq in doc_freqs:
+                self.indptr.append(self.indptr[-1] + freq)
+                self.idf.append(self._idf(freq))
+            total = self.indptr[-1]
+            self.doc_ids = array('I', [0]) * total
+            self.tf_weights = array('d', [0.0]) * total
+            pos_starts = array('Q', accumulate(occurrences, initial=0))
+            self.pos_indptr = array('Q', [0]) * (total + 1)
+            self.pos_indptr[total] = pos_starts[-1]
+            self.positions = array('I', [0]) * pos_starts[-1]
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+            # Runs hold increasing doc ids, so appending each at its term's cursor
+            # keeps every term's postings in document order
+            cursors = (self.indptr[:-1], pos_starts[:-1])
+            if spill is not None:
+                spill.seek(0)
+            for _ in range(runs):
+                self._place_run(pickle.load(spill), cursors)
+            self._place_run(pending, cursors)
+        finally:
+            if spill is not None:
+                spill.close()
+        for start, end in zip(self.indptr, self.indptr[1:]):
+            self.max_weights.append(max(self.tf_weights[start:end], default=0.0))
+            self.block_max.extend(max(self.tf_weights[block:min(block + self.BLOCK, end)])
+                                  for block in range(start, end, self.BLOCK))
+            self.block_ptr.append(len(self.block_max))
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+    def _place_run(self, run, cursors):
+        """Copy per-term postings and their positions to the term's cursors"""
+        posting_cursors, position_cursors = cursors
+        for term, (docs, weights, counts, positions) in run.items():
+            start, pos = posting_cursors[term], position_cursors[term]
+            self.doc_ids[start:start + len(docs)] = docs
+            self.tf_weights[start:start + len(docs)] = weights
+            self.pos_indptr[start:start + len(docs)] = array('Q', accumulate(counts[:-1], initial=pos))
+            self.positions[pos:pos + len(positions)] = positions
+            posting_cursors[term] = start + len(docs)
+            position_cursors[term] = pos + len(positions)
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+    @staticmethod
+    def _grams(word):
+        """Character trigrams of a word padded with ^ and $"""
+        padded = f"^{word}$"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
 
-            scores.append((idx, score))
+    def _index_grams(self):
+        """Trigram index and sorted term order over the vocabulary"""
+        self.terms = list(self.vocab)  # vocab ids are assigned in insertion order
+        self.term_order = array('I', sorted(range(len(self.terms)), key=self.terms.__getitem__))
+        postings = defaultdict(list)
+        for term in sorted(range(len(self.terms)), key=lambda term: len(self.terms[term])):
+            for gram in self._grams(self.terms[term]):
+                postings[gram].append(term)
+        for gram, terms in postings.items():
+            self.gram_ids[gram] = len(self.gram_ids)
+            self.gram_terms.extend(terms)
+            self.gram_indptr.append(len(self.gram_terms))
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+    @staticmethod
+    def _edit_distance(a, b, limit):
+        """Optimal string alignment distance of a and b, or None when above limit"""
+        if abs(len(a) - len(b)) > limit:
+            return None
+        over = limit + 1  # cells outside the diagonal band can only exceed limit
+        before, previous = None, [j if j <= limit else over for j in range(len(b) + 1)]
+        for i in range(1, len(a) + 1):
+            current = [i if i <= limit else over] + [over] * len(b)
+            for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+                cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+                if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                    cost = min(cost, before[j - 2] + 1)
+                current[j] = cost
+            if min(current) > limit:
+                return None
+            before, previous = previous, current
+        return previous[-1] if previous[-1] <= limit else None
 
+    def _fuzzy_terms(self, word):
+        """(term id, edits) of the vocabulary terms closest to a word the index lacks.
 
-# ============ SEARCH FUNCTIONS ============
-def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+        Words of 5-7 characters allow one edit, longer ones two; a term the word
+        (of 4+ characters) is a prefix of counts as one edit. Typo candidates come
+        from the postings of the word's trigrams, narrowed to terms of about its
+        length; the FUZZY_VERIFY sharing the most trigrams are checked by edit
+        distance. Prefix candidates come from a binary search of term_order.
+        """
+        if len(word) < 4:
+            return []
+        max_edits = 0 if len(word) < 5 else 1 if len(word) < 8 else 2
+        found = {}
+        if max_edits:
+            grams = self._grams(word)
+            length = lambda term: len(self.terms[term])  # noqa: E731
+            shared = Counter()
+            for gram in grams:
+                g = self.gram_ids.get(gram)
+                if g is not None:
+                    start = bisect_left(self.gram_terms, len(word) - max_edits,
+                                        self.gram_indptr[g], self.gram_indptr[g + 1], key=length)
+                    end = bisect_right(self.gram_terms, len(word) + max_edits, start, self.gram_indptr[g + 1], key=length)
+                    shared.update(self.gram_terms[start:end])
+            # An edit changes at most three trigrams, a transposition four
+            needed = max(1, len(grams) - 3 * max_edits - 1)
+            candidates = sorted((-count, term) for term, count in shared.items() if count >= needed)
+            for _, term in candidates[:FUZZY_VERIFY]:
+                edits = self._edit_distance(word, self.terms[term], max_edits)
+                if edits is not None:
+                    found[term] = edits
+        first = bisect_left(self.term_order, word, key=self.terms.__getitem__)
+        for term in self.term_order[first:]:
+            if not self.terms[term].startswith(word):
+                break
+            found.setdefault(term, 1)
 
+        matches = sorted((edits, self.indptr[term] - self.indptr[term + 1], self.terms[term], term)
+                         for term, edits in found.items() if self.indptr[term + 1] > self.indptr[term])
+        return [(term, edits) for edits, _, _, term in matches[:FUZZY_CANDIDATES]]
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
+    def query_terms(self, query_tokens, penalty=None):
+        """(term id, boost) of each query token, in query order.
+
+        Tokens found in the index have boost 1; any other token expands to its
+        _fuzzy_terms, boosted by penalty (default FUZZY_PENALTY) per edit.
+        """
+        penalty = FUZZY_PENALTY if penalty is None else penalty
+        terms = []
+        for token in query_tokens:
+            term = self.vocab.get(token)
+            if term is not None and self.indptr[term + 1] > self.indptr[term]:
+                terms.append((term, 1.0))
+            elif penalty > 0:
+                terms.extend((match, penalty ** edits) for match, edits in self._fuzzy_terms(token))
+        return terms
+
+    def parse_query(self, query):
+        """(tokens, phrases) of a query string, phrases being the tokens of each "quoted" part.
+
+        In an index with normalized fields each token is its _normalize term.
+        """
+        tokens = self.tokenize(query)
+        phrases = [self.tokenize(phrase) for phrase in re.findall(r'"([^"]+)"', str(query))]
+        if self.normalized:
+            tokens = [_normalize(token) for token in tokens]
+            phrases = [[_normalize(token) for token in phrase] for phrase in phrases]
+        return tokens, [phrase for phrase in phrases if phrase]
+
+    def _phrase_term(self, token):
+        """Term id a phrase token matches: itself, or else its closest fuzzy match"""
+        term = self.vocab.get(token)
+        if term is not None and self.indptr[term + 1] > self.indptr[term]:
+            return term
+        matches = self._fuzzy_terms(token) if FUZZY_PENALTY > 0 else []
+        return matches[0][0] if matches else None
+
+    def _intersect(self, terms):
+        """(doc, posting of each term) of every document holding all terms, in document order"""
+        postings = [dict(zip(self.doc_ids[self.indptr[term]:self.indptr[term + 1]],
+                             range(self.indptr[term], self.indptr[term + 1]))) for term in terms]
+        common = set(min(postings, key=len)).intersection(*postings)
+        return [(doc, [found[doc] for found in postings]) for doc in sorted(common)]
+
+    def _positions(self, posting):
+        return self.positions[self.pos_indptr[posting]:self.pos_indptr[posting + 1]]
+
+    def _phrase_docs(self, terms):
+        """Documents where terms occur at consecutive positions"""
+        docs = set()
+        for doc, postings in self._intersect(terms):
+            starts = self._positions(postings[0])
+            for offset, posting in enumerate(postings[1:], 1):
+                following = self._positions(posting)
+                starts = [start for start in starts if start + offset in following]
+                if not starts:
+                    break
+            else:
+                docs.add(doc)
+        return docs
+
+    @staticmethod
+    def _distance(first, second):
+        """Smallest gap between positions of two ascending position lists"""
+        i = j = 0
+        best = float("inf")
+        while i < len(first) and j < len(second):
+            best = min(best, abs(first[i] - second[j]))
+            if first[i] < second[j]:
+                i += 1
+            else:
+                j += 1
+        return best
+
+    def _proximity(self, pairs, docs):
+        """Score bonus of each of docs for the (term, term, weight) pairs it holds close together"""
+        bonus = {}
+        doc_ids, pos_indptr, positions = self.doc_ids, self.pos_indptr, self.positions
+        for a, b, weight in pairs:
+            a_start, a_end, b_start, b_end = self.indptr[a], self.indptr[a + 1], self.indptr[b], self.indptr[b + 1]
+            for doc in docs:
+                first = bisect_left(doc_ids, doc, a_start, a_end)
+                if first == a_end or doc_ids[first] != doc:
+                    continue
+                second = bisect_left(doc_ids, doc, b_start, b_end)
+                if second == b_end or doc_ids[second] != doc:
+                    continue
+                if pos_indptr[first + 1] - pos_indptr[first] == 1 == pos_indptr[second + 1] - pos_indptr[second]:
+                    distance = abs(positions[pos_indptr[first]] - positions[pos_indptr[second]])
+                else:
+                    distance = self._distance(self._positions(first), self._positions(second))
+                if distance <= PROXIMITY_WINDOW:
+                    bonus[doc] = bonus.get(doc, 0.0) + weight / distance
+        return bonus
+
+    def _bound(self, term, boost):
+        """Largest score a (term, boost) query term can add to a document"""
+        return self.idf[term] * self.max_weights[term] * boost
+
+    def plan(self, query_tokens, phrases=()):
+        """(term id, boost) pairs, proximity pairs and the documents matching every
+        phrase (None without phrases) for a parsed query.
+
+        Terms are ordered by decreasing _bound, the order in which both engines
+        sum them. Proximity pairs are (term, term, weight) for consecutive
+        distinct query terms; phrases are checked on the documents holding all
+        their terms only.
+        """
+        terms = sorted(self.query_terms(query_tokens), key=lambda item: -self._bound(*item))
+        pairs = []
+        if PROXIMITY_WEIGHT > 0:
+            known = [self.vocab[token] for token in query_tokens
+                     if token in self.vocab and self.indptr[self.vocab[token] + 1] > self.indptr[self.vocab[token]]]
+            pairs = [(a, b, PROXIMITY_WEIGHT * min(self.idf[a], self.idf[b])) for a, b in zip(known, known[1:]) if a != b]
+        allowed = None
+        for phrase in phrases:
+            phrase_terms = [self._phrase_term(token) for token in phrase]
+            docs = set() if None in phrase_terms else self._phrase_docs(phrase_terms)
+            allowed = docs if allowed is None else allowed & docs
+        return terms, pairs, allowed
+
+    def updated(self, documents, memory_budget=None):
+        """A new index over documents, tokenizing only those this index does not hold.
+
+        Appended, edited and deleted documents are found by content hash; the
+        statistics and postings of the result equal a fresh fit(documents).
+        Returns (index, number of documents tokenized). Needs the forward index
+        (see has_forward).
+        """
+        bm25 = BM25(self.k1, self.b, self.field_weights, self.field_normalize)
+        tokenized = bm25.fit(documents, memory_budget, reuse=self)
+        return bm25, tokenized
+
+    def score(self, query, top_k=None):
+        """Score documents sharing a term with the query.
+
+        Only postings of query terms are visited, so documents scoring zero are
+        never returned. "Quoted" phrases must occur verbatim, and the best hits
+        gain a bonus for query terms near each other. Results are (doc_id, score)
+        pairs, best first, ties broken by doc_id; top_k bounds the selection heap
+        (a negative top_k selects nothing, as with NumpyScorer).
+        """
+        tokens, phrases = self.parse_query(query)
+        return self.score_tokens(tokens, top_k, phrases)
+
+    def _accumulate(self, terms, depth=None):
+        """Scores of the documents matching planned terms; with a depth, MaxScore pruning
+        keeps exact scores only for the documents that can reach the depth best."""
+        remaining = sum(self._bound(term, boost) for term, boost in terms)
+        scores, closed = {}, False
+        for term, boost in terms:
+            idf = self.idf[term]
+            start, end = self.indptr[term], self.indptr[term + 1]
+            remaining -= self._bound(term, boost)
+            if depth and not scores and end - start > 4 * self.BLOCK:
+                self._accumulate_blocks(scores, term, boost, depth, remaining)
+            elif closed and len(scores) * 16 < end - start:
+                for idx in list(scores):
+                    posting = bisect_left(self.doc_ids, idx, start, end)
+                    if posting < end and self.doc_ids[posting] == idx:
+                        weight = self.tf_weights[posting]
+                        scores[idx] += idf * weight if boost == 1.0 else idf * weight * boost
+            elif closed:
+                for idx, weight in zip(self.doc_ids[start:end], self.tf_weights[start:end]):
+                    if idx in scores:
+                        scores[idx] += idf * weight if boost == 1.0 else idf * weight * boost
+            elif boost == 1.0:
+                for idx, weight in zip(self.doc_ids[start:end], self.tf_weights[start:end]):
+                    scores[idx] = scores.get(idx, 0) + idf * weight
+            else:
+                for idx, weight in zip(self.doc_ids[start:end], self.tf_weights[start:end]):
+                    scores[idx] = scores.get(idx, 0) + idf * weight * boost
+            if depth and len(scores) >= depth:
+                # Slack for rounding, so pruning never drops a document that ties the threshold
+                threshold = heapq.nlargest(depth, scores.values())[-1] * (1 - 1e-9)
+                if remaining < threshold:
+                    closed = True
+                    scores = {idx: score for idx, score in scores.items() if score + remaining >= threshold}
+        return scores
+
+    def _accumulate_blocks(self, scores, term, boost, depth, rest):
+        """Score a first query term block by block, best block_max first, until no
+        block can lift a document to the depth-th best score (rest bounds the other terms)"""
+        idf = self.idf[term]
+        start, end = self.indptr[term], self.indptr[term + 1]
+        first = self.block_ptr[term]
+        best = []  # min-heap of the depth best scores so far
+        for block in sorted(range(first, self.block_ptr[term + 1]), key=self.block_max.__getitem__, reverse=True):
+            if len(best) == depth and idf * self.block_max[block] * boost + rest < best[0] * (1 - 1e-9):
+                break
+            low = start + (block - first) * self.BLOCK
+            high = min(low + self.BLOCK, end)
+            for idx, weight in zip(self.doc_ids[low:high], self.tf_weights[low:high]):
+                score = scores[idx] = idf * weight if boost == 1.0 else idf * weight * boost
+                if len(best) < depth:
+                    heapq.heappush(best, score)
+                elif score > best[0]:
+                    heapq.heapreplace(best, score)
+
+    def score_tokens(self, query_tokens, top_k=None, phrases=(), timings=None):
+        """Same as score() for an already parsed query; timings (a dict) receives
+        the milliseconds spent planning, scoring and ranking"""
+        clock = _Stopwatch(timings)
+        if top_k is not None and top_k <= 0:
+            return []
+        terms, pairs, allowed = self.plan(query_tokens, phrases)
+        clock.lap("plan")
+        if allowed is not None:
+            scores = {idx: score for idx, score in self._accumulate(terms).items() if idx in allowed}
+        else:
+            scores = self._accumulate(terms, top_k and (max(top_k, PROXIMITY_RESCORE) if pairs else top_k))
+
+        rank_key = lambda item: (item[1], -item[0])
+        if pairs:
+            rescored = scores
+            if top_k is not None:
+                best = heapq.nlargest(max(top_k, PROXIMITY_RESCORE), scores.values())
+                if best:
+                    rescored = [idx for idx, score in scores.items() if score >= best[-1]]
+            for idx, extra in self._proximity(pairs, rescored).items():
+                scores[idx] += extra
+        clock.lap("score")
+        if top_k is None:
+            ranked = sorted(scores.items(), key=rank_key, reverse=True)
+        else:
+            ranked = heapq.nlargest(top_k, scores.items(), key=rank_key)
+        clock.lap("rank")
+        return ranked
+
+    def score_batch(self, query_token_lists, top_k=None, phrase_lists=None):
+        """Rank several parsed queries; one result list per query"""
+        phrase_lists = phrase_lists or [()] * len(query_token_lists)
+        return [self.score_tokens(tokens, top_k, phrases) for tokens, phrases in zip(query_token_lists, phrase_lists)]
+
+    def stats(self):
+        """Documents, terms, postings and positions held, and the bytes of the index arrays"""
+        arrays = [value for value in vars(self).values() if isinstance(value, array)]
+        return {"documents": self.N, "terms": len(self.vocab), "postings": len(self.doc_ids),
+                "positions": len(self.positions), "array_bytes": sum(a.itemsize * len(a) for a in arrays)}
+
+    def explain(self, planned, doc):
+        """Break a document's score down by query term, for a plan() result.
+
+        Each matched term lists its IDF, raw tf (occurrences across fields),
+        BM25F tf weight, boost (below 1 for fuzzy matches) and contribution
+        idf * weight * boost; proximity is the bonus for query terms near each other.
+        """
+        terms, pairs, _ = planned
+        contributions = []
+        for term, boost in terms:
+            start, end = self.indptr[term], self.indptr[term + 1]
+            posting = bisect_left(self.doc_ids, doc, start, end)
+            if posting < end and self.doc_ids[posting] == doc:
+                weight = self.tf_weights[posting]
+                contributions.append({
+                    "term": self.terms[term],
+                    "idf": self.idf[term],
+                    "tf": self.pos_indptr[posting + 1] - self.pos_indptr[posting],
+                    "weight": weight,
+                    "boost": boost,
+                    "contribution": self.idf[term] * weight * boost
+                })
+        return {"terms": contributions, "proximity": self._proximity(pairs, [doc]).get(doc, 0.0) if pairs else 0.0}
+
+
+class NumpyBM25:
+    """Vectorized BM25 backend built from a fitted BM25 (requires NumPy).
+
+    The postings arrays are viewed as a sparse term-document matrix stored
+    term-major (indptr / doc_ids / weights) with IDF folded into the precomputed
+    BM25F tf weights, so a query is a sparse matrix-vector product (bincount)
+    and a batch a matrix-matrix one. Weights and summation order mirror BM25.score_tokens,
+    giving identical scores and rankings; phrase and proximity matching come
+    from the BM25 index.
+    """
+
+    BATCH_CELLS = 250_000  # cap on queries x documents scored in one product
+    MIN_BATCH = 8          # below this many queries per product, score one at a time
+
+    def __init__(self, bm25):
+        self.parse_query = bm25.parse_query
+        self.plan = bm25.plan
+        self.proximity = bm25._proximity
+        self.N = bm25.N
+        self.indptr = np.asarray(bm25.indptr, dtype=np.int64)
+        self.doc_ids = np.asarray(bm25.doc_ids, dtype=np.int64)
+        idf = np.repeat(np.asarray(bm25.idf, dtype=np.float64), np.diff(self.indptr))
+        self.weights = idf * np.asarray(bm25.tf_weights, dtype=np.float64)
+
+    def _postings(self, terms):
+        """Positions into doc_ids/weights for every (term, boost), in query order, and their boosts"""
+        if not terms:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        spans = [np.arange(self.indptr[term], self.indptr[term + 1]) for term, _ in terms]
+        boosts = np.repeat(np.array([boost for _, boost in terms], dtype=np.float64), [len(span) for span in spans])
+        return np.concatenate(spans), boosts
+
+    def _top_k(self, scores, top_k):
+        """(doc_id, score) pairs with score > 0, best first, ties broken by doc_id"""
+        candidates = np.flatnonzero(scores > 0)
+        if top_k is not None:
+            if top_k <= 0:
+                return []
+            if top_k < len(candidates):
+                # argpartition finds the k-th best score; keep every tie so doc_id decides
+                values = scores[candidates]
+                kth = values[np.argpartition(-values, top_k - 1)[top_k - 1]]
+                candidates = candidates[values >= kth]
+        order = np.lexsort((candidates, -scores[candidates]))
+        return [(int(idx), float(scores[idx])) for idx in candidates[order][:top_k]]
+
+    def _adjust(self, scores, pairs, allowed, top_k):
+        """Zero documents failing a phrase and add proximity bonuses to the best hits, in place"""
+        if allowed is not None:
+            keep = np.zeros(self.N, dtype=bool)
+            keep[np.fromiter(allowed, dtype=np.int64, count=len(allowed))] = True
+            scores[~keep] = 0
+        if pairs:
+            rescored = np.flatnonzero(scores > 0)
+            depth = len(rescored) if top_k is None else max(top_k, PROXIMITY_RESCORE)
+            if depth < len(rescored):
+                values = scores[rescored]
+                rescored = rescored[values >= values[np.argpartition(-values, depth - 1)[depth - 1]]]
+            bonus = self.proximity(pairs, rescored.tolist())
+            if bonus:
+                scores[np.fromiter(bonus, dtype=np.int64, count=len(bonus))] += \
+                    np.fromiter(bonus.values(), dtype=np.float64, count=len(bonus))
+
+    def score(self, query, top_k=None):
+        """Score documents against a query string"""
+        tokens, phrases = self.parse_query(query)
+        return self.score_tokens(tokens, top_k, phrases)
+
+    def score_tokens(self, query_tokens, top_k=None, phrases=(), timings=None):
+        """Sparse matrix-vector scoring of one parsed query (timings as in BM25.score_tokens)"""
+        clock = _Stopwatch(timings)
+        terms, pairs, allowed = self.plan(query_tokens, phrases)
+        clock.lap("plan")
+        positions, boosts = self._postings(terms)
+        scores = np.bincount(self.doc_ids[positions], weights=self.weights[positions] * boosts, minlength=self.N)
+        self._adjust(scores, pairs, allowed, top_k)
+        clock.lap("score")
+        ranked = self._top_k(scores, top_k)
+        clock.lap("rank")
+        return ranked
+
+    def score_batch(self, query_token_lists, top_k=None, phrase_lists=None):
+        """Sparse matrix-matrix scoring of several parsed queries"""
+        phrase_lists = phrase_lists or [()] * len(query_token_lists)
+        chunk = self.BATCH_CELLS // max(self.N, 1)
+        if chunk < self.MIN_BATCH:
+            return [self.score_tokens(tokens, top_k, phrases) for tokens, phrases in zip(query_token_lists, phrase_lists)]
+        rankings = []
+        for start in range(0, len(query_token_lists), chunk):
+            plans = [self.plan(tokens, phrases) for tokens, phrases
+                     in zip(query_token_lists[start:start + chunk], phrase_lists[start:start + chunk])]
+            positions, boosts = zip(*(self._postings(terms) for terms, _, _ in plans))
+            rows = np.repeat(np.arange(len(plans)) * self.N, [len(p) for p in positions])
+            flat = np.concatenate(positions)
+            scores = np.bincount(rows + self.doc_ids[flat], weights=self.weights[flat] * np.concatenate(boosts),
+                                 minlength=len(plans) * self.N).reshape(len(plans), self.N)
+            for row, (_, pairs, allowed) in zip(scores, plans):
+                self._adjust(row, pairs, allowed, top_k)
+            rankings.extend(self._top_k_rows(scores, top_k))
+        return rankings
+
+    def _top_k_rows(self, scores, top_k):
+        """Row-wise _top_k over a queries x documents score matrix"""
+        if top_k is not None and top_k <= 0:
+            return [[] for _ in scores]
+        keep = scores > 0
+        if top_k is not None and top_k < self.N:
+            kth = -np.partition(-scores, top_k - 1, axis=1)[:, top_k - 1]
+            keep &= scores >= kth[:, None]
+        rows, docs = np.nonzero(keep)
+        values = scores[rows, docs]
+        order = np.lexsort((docs, -values, rows))
+        ends = np.cumsum(np.bincount(rows, minlength=len(scores))).tolist()
+        pairs = list(zip(docs[order].tolist(), values[order].tolist()))
+        return [pairs[start:end][:top_k] for start, end in zip([0] + ends[:-1], ends)]
+
+
+# Vectorized backends built on demand for each loaded BM25 index (a WeakKeyDictionary once NumPy is imported)
+_VECTORIZED = None
+
+
+def _scorer(bm25, engine):
+    """Scoring backend for a fitted index; "numpy" falls back to BM25 without NumPy"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}. Available: {', '.join(ENGINES)}")
+    if engine == "numpy" and HAS_NUMPY and bm25.N:
+        global np, _VECTORIZED
+        if np is None:
+            import numpy as np
+            import weakref
+            _VECTORIZED = weakref.WeakKeyDictionary()
+        scorer = _VECTORIZED.get(bm25)
+        if scorer is None:
+            scorer = _VECTORIZED[bm25] = NumpyBM25(bm25)
+        return scorer
+    return bm25
+
+
+# ============ ROW STORE ============
+class RowStore:
+    """Column-major CSV rows: one UTF-8 blob plus an offsets array per column.
+
+    Cells are decoded only when a row is read, so a loaded catalog costs a few
+    bytes per cell instead of a dict and a string object per cell for every row.
+    Cells missing from short CSV lines read as None, like csv.DictReader.
+    Offsets are 32-bit, widened to 64-bit for a column whose blob outgrows 4 GiB.
+    """
+
+    def __init__(self, columns=()):
+        self.columns = tuple(columns)
+        self._positions = {col: c for c, col in enumerate(self.columns)}
+        self._blobs = [bytearray() for _ in self.columns]
+        self._offsets = [array('I', [0]) for _ in self.columns]
+        self._missing = set()  # (row, column position) of absent cells
+        self._len = 0
+
+    def append(self, values):
+        """Add a row from a sequence of column values (extra values are ignored)"""
+        for c, blob in enumerate(self._blobs):
+            if c < len(values):
+                blob += values[c].encode('utf-8')
+            else:
+                self._missing.add((self._len, c))
+            try:
+                self._offsets[c].append(len(blob))
+            except OverflowError:
+                self._offsets[c] = array('Q', self._offsets[c])
+                self._offsets[c].append(len(blob))
+        self._len += 1
+
+    def __len__(self):
+        return self._len
+
+    def get(self, row, col, default=None):
+        """One decoded cell; default when the store has no such column"""
+        c = self._positions.get(col)
+        if c is None:
+            return default
+        if (row, c) in self._missing:
+            return None
+        offsets = self._offsets[c]
+        return self._blobs[c][offsets[row]:offsets[row + 1]].decode('utf-8')
+
+    def row(self, row, columns=None):
+        """Dict of the given columns (default: all) that the store has"""
+        return {col: self.get(row, col) for col in (columns or self.columns) if col in self._positions}
+
+    def __getitem__(self, row):
+        return self.row(row)
+
+    def __iter__(self):
+        return (self.row(row) for row in range(self._len))
+
+    def column(self, col, default=""):
+        """Every value of a column, in row order"""
+        return (self.get(row, col, default) for row in range(self._len))
+
+
+# ============ INDEX CACHE ============
+def _read_rows(stream, columns=None):
+    """Read CSV text into a RowStore line by line, keeping only the given columns (default: all)"""
+    reader = csv.reader(stream)
+    header = next(reader, [])
+    keep = [i for i, col in enumerate(header) if columns is None or col in columns]
+    rows = RowStore(header[i] for i in keep)
+    for values in reader:
+        if values:
+            rows.append([values[i] for i in keep if i < len(values)])
+    return rows
+
+
+def _parse_csv(raw, columns=None):
+    """Parse raw CSV bytes into a RowStore"""
+    return _read_rows(io.StringIO(raw.decode('utf-8'), newline=None), columns)
+
+
+def _stream_csv(filepath, columns=None):
+    """Read a CSV file into a RowStore without loading the whole file first"""
+    # newline=None translates line endings the same way _parse_csv does
+    with open(filepath, 'r', encoding='utf-8', newline=None) as f:
+        return _read_rows(f, columns)
+
+
+def _file_digest(filepath, chunk_size=1 << 20):
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _field_weights(config):
+    """BM25F weight of each search column ("weights" in the config, default 1)"""
+    weights = config.get("weights", {})
+    return tuple(float(weights.get(col, 1)) for col in config["search_cols"])
+
+
+def _field_normalize(config):
+    """Whether each search column's words are normalized ("normalize" in the config, default true)"""
+    return (bool(config.get("normalize", True)),) * len(config["search_cols"])
+
+
+def _stored_columns(config):
+    """Columns kept in memory for a CSV: the indexed and the returned ones"""
+    return set(config["search_cols"]) | set(config["output_cols"])
+
+
+def _index_spec(config):
+    """Hashable description of how a CSV is loaded: search columns, their weights, output columns and normalization"""
+    normalize = _SYNONYMS_KEY if any(_field_normalize(config)) else None
+    return tuple(config["search_cols"]), _field_weights(config), tuple(config["output_cols"]), normalize
+
+
+# Layout: CACHE_DIR/objects holds index entries named after the CSV's sha256 and
+# the index spec, so byte-identical CSVs (e.g. the skills/ and .shared/ copies of
+# the data) share one entry. CACHE_DIR/refs maps each file path to its last seen
+# size, mtime and object, letting unchanged files skip hashing. An object's
+# forward index (only read to update it after an edit) is a separate
+# objects/forward-<key> file, so loading an index for queries never reads it.
+def _ref_path(filepath, config):
+    """Location of the size/mtime record for a CSV path and its index spec"""
+    key = "|".join([str(INDEX_VERSION), str(Path(filepath).resolve()), repr(_index_spec(config))])
+    return CACHE_DIR / "refs" / f"{Path(filepath).stem}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.pickle"
+
+
+def _object_path(digest, config):
+    """Location of the persisted index for CSV content (its sha256) and an index spec"""
+    spec = hashlib.sha1(f"{INDEX_VERSION}|{_index_spec(config)!r}".encode('utf-8')).hexdigest()[:16]
+    return CACHE_DIR / "objects" / f"{digest}-{spec}.pickle"
+
+
+def _prune_objects(min_age=60):
+    """Delete cached indexes no ref points to any more, and refs of vanished files.
+
+    Objects younger than min_age seconds are kept, as another process may be
+    about to write the ref that points to one of them.
+    """
+    live, cutoff = set(), time.time() - min_age
+    try:
+        for ref_path in (CACHE_DIR / "refs").glob("*.pickle"):
+            ref = _read_cache(ref_path)
+            if ref and os.path.exists(ref["path"]):
+                live.update((ref["object"], ref.get("forward")))
+            else:
+                ref_path.unlink(missing_ok=True)
+        for path in (CACHE_DIR / "objects").glob("*.pickle"):
+            if path.name not in live and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def _read_cache(cache_path):
+    """Load a cache entry, treating any unreadable or stale-format file as a miss"""
+    try:
+        with open(cache_path, 'rb') as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) and entry.get("version") == INDEX_VERSION else None
+
+
+def _atomic_write(path, data):
+    """Write bytes via a temp file and rename, so readers never see a partial file"""
+    import tempfile  # only cache writes need it; kept off the query path's import time
+    tmp = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.stem, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if tmp and os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _write_cache(cache_path, entry):
+    """Atomically write a cache entry; caching is best-effort"""
+    try:
+        _atomic_write(cache_path, pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+    except OSError:
+        pass
+
+
+def _forward_path(bm25):
+    """Location of the persisted forward index of an index"""
+    return CACHE_DIR / "objects" / f"forward-{bm25.forward_key}.pickle"
+
+
+def _with_forward(bm25):
+    """bm25 with its forward index loaded (from its file when not in memory), or None when it has none"""
+    if bm25 is None or bm25.has_forward:
+        return bm25
+    entry = _read_cache(_forward_path(bm25)) if CACHE_DIR else None
+    if entry is None:
+        return None
+    bm25.attach_forward(entry["forward"])
+    return bm25
+
+
+def _build_index(rows, config, stream=False, previous=None):
+    """Fit a BM25F index with one field per search column.
+
+    stream bounds the build's memory (BUILD_MEMORY); previous is an earlier index
+    of the same CSV whose tokenization is reused for unchanged rows, when its
+    forward index is available.
+    """
+    previous = _with_forward(previous)
+    columns = [rows.column(col) for col in config["search_cols"]]
+    documents = ([str(value) for value in values] for values in zip(*columns))
+    budget = BUILD_MEMORY if stream else None
+    if (previous is not None and previous.field_weights == _field_weights(config)
+            and previous.field_normalize == _field_normalize(config)):
+        return previous.updated(documents, budget)[0]
+    bm25 = BM25(field_weights=_field_weights(config), field_normalize=_field_normalize(config))
+    bm25.fit(documents, budget)
+    return bm25
+
+
+def _load_persisted_index(filepath, config, stat, previous=None, rebuild=False, timings=None):
+    """Return (rows, bm25, origin) for a CSV from the cache or bundle ("cache", "bundle"),
+    else updated from previous or fitted ("built"); rebuild ignores persisted indexes.
+    """
+    clock = _Stopwatch(timings)
+    ref_path = _ref_path(filepath, config) if CACHE_DIR else None
+    ref = _read_cache(ref_path) if ref_path else None
+    if ref and not rebuild and ref["size"] == stat.st_size and ref["mtime_ns"] == stat.st_mtime_ns:
+        entry = _read_cache(CACHE_DIR / "objects" / ref["object"])
+        if entry:
+            clock.lap("read")
+            return entry["rows"], entry["bm25"], "cache"
+
+    stream = stat.st_size >= STREAM_BUILD_BYTES
+    raw = None if stream else filepath.read_bytes()
+    digest = _file_digest(filepath) if stream else hashlib.sha256(raw).hexdigest()
+    object_path = _object_path(digest, config) if CACHE_DIR else None
+    entry = _read_cache(object_path) if object_path and not rebuild else None
+    built = entry is None
+    if entry:
+        rows, bm25 = entry["rows"], entry["bm25"]
+        clock.lap("read")
+    else:
+        bundled = None if rebuild else _read_bundle(filepath, config, digest)
+        if bundled:
+            # Content-checked on every load, so a user cache copy would buy little
+            clock.lap("read")
+            return bundled + ("bundle",)
+        if rebuild:
+            previous = None
+        elif previous is None:
+            stale = _read_cache(CACHE_DIR / "objects" / ref["object"]) if ref else None
+            previous = stale["bm25"] if stale else (_read_bundle(filepath, config) or (None, None))[1]
+        clock.lap("read")
+        if stream:
+            rows = _stream_csv(filepath, _stored_columns(config))
+        else:
+            rows = _parse_csv(raw, _stored_columns(config))
+        clock.lap("parse")
+        bm25 = _build_index(rows, config, stream, previous)
+        clock.lap("fit")
+
+    if object_path:
+        forward_path = _forward_path(bm25)
+        if built:
+            _write_cache(object_path, {"version": INDEX_VERSION, "sha256": digest, "rows": rows, "bm25": bm25})
+            _write_cache(forward_path, {"version": INDEX_VERSION, "forward": bm25.forward_index()})
+        _write_cache(ref_path, {
+            "version": INDEX_VERSION,
+            "path": str(filepath.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "object": object_path.name,
+            "forward": forward_path.name
+        })
+        if built and ref:
+            _prune_objects()
+    clock.lap("write")
+    return rows, bm25, "built" if built else "cache"
+
+
+def _load_index(filepath, config, profile=None):
+    """Return (rows, bm25) for a CSV, keeping it warm in memory for long-running processes.
 
-    data = _load_csv(filepath)
+    profile (a dict) receives the index's "origin" ("memory" or as in
+    _load_persisted_index) and the load's stage timings under "stages".
+    """
+    stat = filepath.stat()
+    key = (str(filepath), _index_spec(config))
+    warm = _INDEXES.get(key)
+    if warm and warm[0] == stat.st_size and warm[1] == stat.st_mtime_ns:
+        if profile is not None:
+            profile["origin"] = "memory"
+        return warm[2], warm[3]
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    timings = None if profile is None else profile.setdefault("stages", {})
+    rows, bm25, origin = _load_persisted_index(filepath, config, stat, warm[3] if warm else None, timings=timings)
+    if profile is not None:
+        profile["origin"] = origin
+    _INDEXES[key] = (stat.st_size, stat.st_mtime_ns, rows, bm25)
+    return rows, bm25
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
+def _all_sources():
+    """(group name, filepath, config) of every domain and stack CSV on disk"""
+    sources = [(domain, DATA_DIR / config["file"], config) for domain, config in CSV_CONFIG.items()]
+    sources += [(f"stack:{stack}", DATA_DIR / config["file"], _STACK_COLS) for stack, config in STACK_CONFIG.items()]
+    return [source for source in sources if source[1].exists()]
+
+
+def warm_indexes():
+    """Load every domain and stack index, and detect_domain's vocabulary (built if missing); returns how many indexes"""
+    sources = _all_sources()
+    for _, filepath, config in sources:
+        _load_index(filepath, config)
+    _load_vocabulary(build=True)
+    return len(sources)
+
+
+def refresh_indexes():
+    """Re-load the in-memory indexes whose CSV changed on disk; returns their group names.
+
+    Each changed index is updated from its previous version, so only appended or
+    edited rows are tokenized again. The combined index and detect_domain's
+    vocabulary follow when they are loaded.
+    """
+    changed = []
+    for name, filepath, config in _all_sources():
+        warm = _INDEXES.get((str(filepath), _index_spec(config)))
+        if warm is None:
+            continue
+        stat = filepath.stat()
+        if (warm[0], warm[1]) != (stat.st_size, stat.st_mtime_ns):
+            _load_index(filepath, config)
+            changed.append(name)
+    if changed and (str(DATA_DIR), ALL_DOMAINS) in _INDEXES:
+        _load_combined_index()
+    if changed and _INDEXES.get((str(DATA_DIR), "vocabulary"), (None, None))[1] is not None:
+        _load_vocabulary(build=True)
+    return changed
+
+
+def watch_indexes(interval=1.0, stop=None, log=None):
+    """Poll the data files every interval seconds and apply edits to the loaded indexes.
+
+    Runs until stop (a threading.Event) is set; log, when given, is called with a
+    message for every refresh or failed reload (e.g. of a half-written CSV,
+    which is retried on the next poll).
+    """
+    import threading
+    stop = stop or threading.Event()
+    while not stop.wait(interval):
+        start = time.perf_counter()
+        try:
+            changed = refresh_indexes()
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            if log:
+                log(f"reload failed: {e}")
+            continue
+        if changed and log:
+            log(f"reloaded {', '.join(changed)} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def _build_combined(sources, previous=None, parse=False):
+    """Fit the combined index over the rows of every source, reusing previous's tokenization.
+
+    parse reads each source's rows from its CSV instead of loading its index.
+    """
+    # Each source keeps its own BM25F fields (absent, i.e. None, in other sources'
+    # documents) so field length norms, weights and normalization match the per-file
+    # indexes; queries are normalized when any source is
+    combined = {"sources": [], "doc_sources": array('H'), "offsets": [], "rows": []}
+    field_starts, field_weights, field_normalize, size = [], [], [], 0
+    for position, (name, filepath, config) in enumerate(sources):
+        rows = _stream_csv(filepath, _stored_columns(config)) if parse else _load_index(filepath, config)[0]
+        combined["sources"].append((name, filepath.relative_to(DATA_DIR).as_posix(), config["output_cols"]))
+        combined["offsets"].append(len(combined["doc_sources"]))
+        combined["doc_sources"].extend([position] * len(rows))
+        combined["rows"].append(rows)
+        field_starts.append(len(field_weights))
+        field_weights.extend(_field_weights(config))
+        field_normalize.extend(_field_normalize(config))
+        size += filepath.stat().st_size
+
+    def documents():
+        width = len(field_weights)
+        for (_, _, config), rows, start in zip(sources, combined["rows"], field_starts):
+            padding = [None] * (width - start - len(config["search_cols"]))
+            columns = [rows.column(col) for col in config["search_cols"]]
+            for values in zip(*columns):
+                yield [None] * start + [str(value) for value in values] + padding
+
+    budget = BUILD_MEMORY if size >= STREAM_BUILD_BYTES else None
+    previous = _with_forward(previous)
+    if (previous is not None and previous.field_weights == tuple(field_weights)
+            and previous.field_normalize == tuple(field_normalize)):
+        combined["bm25"] = previous.updated(documents(), budget)[0]
+    else:
+        combined["bm25"] = BM25(field_weights=field_weights, field_normalize=field_normalize)
+        combined["bm25"].fit(documents(), budget)
+    return combined
+
+
+def _sources_version(sources):
+    """Path, index spec, size and mtime of every source, identifying the combined index's inputs"""
+    return tuple((str(filepath), _index_spec(config), stat.st_size, stat.st_mtime_ns)
+                 for filepath, config, stat in ((source[1], source[2], source[1].stat()) for source in sources))
+
+
+def _load_persisted_combined(sources, version, previous=None, rebuild=False, parse=False):
+    """Return (combined, origin) like _load_persisted_index, for the combined index.
+
+    The ref records the sources' size/mtime version instead of one file's, and a
+    stale combined index (previous, else the one of the ref) is updated; parse
+    is passed on to _build_combined.
+    """
+    combined_config = {"search_cols": [ALL_DOMAINS], "output_cols": []}
+    ref_path = _ref_path(DATA_DIR / ALL_DOMAINS, combined_config) if CACHE_DIR else None
+    ref = _read_cache(ref_path) if ref_path else None
+    entry = _read_cache(CACHE_DIR / "objects" / ref["object"]) if ref else None
+    if entry and not rebuild and ref["sources_version"] == version:
+        return entry["index"], "cache"
+
+    digest = _sources_digest(sources)
+    object_path = _object_path(digest, combined_config) if CACHE_DIR else None
+    current = _read_cache(object_path) if object_path and not rebuild else None
+    if current:
+        combined, origin = current["index"], "cache"
+    else:
+        bundled = None if rebuild else _read_bundle_segment(_COMBINED_BUNDLE_KEY, digest)
+        previous = None if rebuild else previous or (entry["index"] if entry else None)
+        combined = bundled["combined"] if bundled else _build_combined(sources, previous and previous["bm25"], parse)
+        origin = "bundle" if bundled else "built"
+        if object_path:
+            _write_cache(object_path, {"version": INDEX_VERSION, "sha256": digest, "index": combined})
+            if not bundled:
+                _write_cache(_forward_path(combined["bm25"]),
+                             {"version": INDEX_VERSION, "forward": combined["bm25"].forward_index()})
+    if ref_path:
+        _write_cache(ref_path, {"version": INDEX_VERSION, "path": str(DATA_DIR.resolve()),
+                                "sources_version": version, "object": object_path.name,
+                                "forward": _forward_path(combined["bm25"]).name})
+        if not current and ref:
+            _prune_objects()
+    return combined, origin
+
+
+def _load_combined_index():
+    """One BM25 index over every domain and stack CSV, for domain="all" searches.
+
+    Returns a dict with "sources" [(group name, file, output_cols)], "doc_sources"
+    (source position of each document), "offsets" (first document of each source),
+    "rows" (each source's RowStore) and "bm25". It is rebuilt from the
+    per-file indexes whenever any CSV's size or mtime changes.
+    """
+    sources = _all_sources()
+    version = _sources_version(sources)
+    key = (str(DATA_DIR), ALL_DOMAINS)
+    warm = _INDEXES.get(key)
+    if warm and warm[0] == version:
+        return warm[1]
+
+    combined, _ = _load_persisted_combined(sources, version, warm[1] if warm else None)
+    _INDEXES[key] = (version, combined)
+    return combined
+
+
+def _build_cached_index(filepath, config, rebuild=False):
+    """Worker of build_indexes: bring one CSV's persisted index up to date, timing it"""
+    start = time.perf_counter()
+    rows, _, origin = _load_persisted_index(filepath, config, filepath.stat(), rebuild=rebuild)
+    return {"rows": len(rows), "status": origin, "build_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def _build_cached_combined(rebuild=False):
+    """Worker of build_indexes: bring the persisted combined index up to date, timing it"""
+    start = time.perf_counter()
+    sources = _all_sources()
+    combined, origin = _load_persisted_combined(sources, _sources_version(sources), rebuild=rebuild, parse=True)
+    return {"rows": len(combined["doc_sources"]), "status": origin,
+            "build_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def build_indexes(workers=None, rebuild=False):
+    """Fit every domain and stack index into the on-disk cache across worker processes.
+
+    The combined domain="all" index (which reads every CSV itself) and then the
+    CSVs, largest first, are handed out to workers (default: one per CPU), each
+    writing its cache entries atomically; detect_domain's vocabulary follows.
+    rebuild refits even indexes that are current. Returns one report dict per
+    index with its rows, status ("cache" when it was already current, "bundle"
+    when the precompiled bundle holds it, else "built") and build_ms.
+    """
+    if CACHE_DIR is None:
+        raise RuntimeError("the on-disk index cache is disabled (UIPRO_NO_CACHE)")
+    sources = _all_sources()
+    largest_first = sorted(sources, key=lambda source: source[1].stat().st_size, reverse=True)
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        builds = {ALL_DOMAINS: pool.submit(_build_cached_combined, rebuild)}
+        builds.update((name, pool.submit(_build_cached_index, filepath, config, rebuild))
+                      for name, filepath, config in largest_first)
+        files = [(name, filepath.relative_to(DATA_DIR).as_posix()) for name, filepath, _ in sources]
+        report = [{"source": name, "file": file, **builds[name].result()} for name, file in files + [(ALL_DOMAINS, "*")]]
+    start = time.perf_counter()
+    vocabulary, origin = _load_vocabulary(build=True, rebuild=rebuild)
+    report.append({"source": "vocabulary", "file": "*", "rows": len(vocabulary), "status": origin,
+                   "build_ms": round((time.perf_counter() - start) * 1000, 2)})
+    return report
+
+
+# ============ PRECOMPILED BUNDLE ============
+# Layout: BUNDLE_MAGIC, 8-byte little-endian TOC length, pickled TOC, then one
+# pickled segment per CSV. The TOC maps (relative file, index spec) to the CSV's
+# sha256 and the segment's offset/length (relative to the end of the TOC), so a
+# query loads only the segment of the domain it searches.
+_BUNDLE_TOCS = {}
+
+
+_COMBINED_BUNDLE_KEY = (ALL_DOMAINS, "combined")
+_VOCABULARY_BUNDLE_KEY = ("domain-vocabulary", "vocabulary")
+
+
+def _bundle_key(filepath, config):
+    return filepath.relative_to(DATA_DIR).as_posix(), repr(_index_spec(config))
+
+
+def _sources_digest(sources):
+    """Content hash of every source CSV and its index spec, keying the combined index"""
+    digest = hashlib.sha256()
+    for _, filepath, config in sources:
+        digest.update(repr(_bundle_key(filepath, config)).encode("utf-8"))
+        digest.update(hashlib.sha256(filepath.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def _bundle_toc(path):
+    """(toc, data offset) of a bundle, cached per size/mtime; None when absent or stale"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    cached = _BUNDLE_TOCS.get(str(path))
+    if cached and cached[0] == (stat.st_size, stat.st_mtime_ns):
+        return cached[1]
+
+    toc = None
+    try:
+        with open(path, 'rb') as f:
+            if f.readline() == BUNDLE_MAGIC:
+                (length,) = struct.unpack("<Q", f.read(8))
+                entries = pickle.loads(f.read(length))
+                if entries.get("version") == INDEX_VERSION:
+                    toc = (entries["entries"], f.tell())
+    except (OSError, EOFError, struct.error, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        toc = None
+    _BUNDLE_TOCS[str(path)] = ((stat.st_size, stat.st_mtime_ns), toc)
+    return toc
+
+
+def _read_bundle_segment(key, digest, path=None):
+    """Unpickle one bundle segment when its recorded content hash matches digest (None: any)"""
+    toc = _bundle_toc(path or BUNDLE_FILE)
+    if not toc:
+        return None
+    entries, data_offset = toc
+    entry = entries.get(key)
+    if not entry or digest is not None and entry["sha256"] != digest:
+        return None
+    try:
+        with open(path or BUNDLE_FILE, 'rb') as f:
+            f.seek(data_offset + entry["offset"])
+            return pickle.loads(f.read(entry["length"]))
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        return None
+
+
+def _read_bundle(filepath, config, digest=None):
+    """(rows, bm25) from the bundle when it holds this CSV content (None: any) and index spec"""
+    segment = _read_bundle_segment(_bundle_key(filepath, config), digest)
+    if not segment:
+        return None
+    return segment["rows"], segment["bm25"]
+
+
+def build_bundle(path=None, extra=()):
+    """Compile every domain and stack CSV into one precomputed bundle.
+
+    Each segment stores the CSV's RowStore plus its fitted BM25F index
+    (postings arrays and IDF table); further segments hold the combined
+    domain="all" index and detect_domain's vocabulary. extra adds segments
+    built by other modules, as (key, name, build) where build() returns
+    (content digest, payload dict, rows). Returns one report dict per segment.
+    """
+    path = Path(path or BUNDLE_FILE)
+    entries, segments, report = {}, [], []
+
+    def add(key, digest, segment, name, file, rows, start):
+        entries[key] = {"sha256": digest, "offset": sum(map(len, segments)), "length": len(segment)}
+        segments.append(segment)
+        report.append({"source": name, "file": file, "rows": rows, "bytes": len(segment),
+                       "build_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+    sources, indexes = _all_sources(), {}
+    for name, filepath, config in sources:
+        start = time.perf_counter()
+        raw = filepath.read_bytes()
+        rows = _parse_csv(raw, _stored_columns(config))
+        indexes[name] = _build_index(rows, config)
+        segment = pickle.dumps({"rows": rows, "bm25": indexes[name]}, protocol=pickle.HIGHEST_PROTOCOL)
+        add(_bundle_key(filepath, config), hashlib.sha256(raw).hexdigest(), segment,
+            name, filepath.relative_to(DATA_DIR).as_posix(), len(rows), start)
+
+    start = time.perf_counter()
+    combined = _build_combined(sources)
+    add(_COMBINED_BUNDLE_KEY, _sources_digest(sources),
+        pickle.dumps({"combined": combined}, protocol=pickle.HIGHEST_PROTOCOL),
+        ALL_DOMAINS, "*", len(combined["doc_sources"]), start)
+
+    start = time.perf_counter()
+    domains = _vocabulary_sources()
+    vocabulary = _build_vocabulary([(name, indexes[name]) for name, _, _ in domains])
+    add(_VOCABULARY_BUNDLE_KEY, _sources_digest(domains),
+        pickle.dumps({"vocabulary": vocabulary}, protocol=pickle.HIGHEST_PROTOCOL),
+        "vocabulary", "*", len(vocabulary), start)
+
+    for key, name, build in extra:
+        start = time.perf_counter()
+        digest, payload, rows = build()
+        add(key, digest, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), name, "*", rows, start)
+
+    toc = pickle.dumps({"version": INDEX_VERSION, "entries": entries}, protocol=pickle.HIGHEST_PROTOCOL)
+    _atomic_write(path, BUNDLE_MAGIC + struct.pack("<Q", len(toc)) + toc + b"".join(segments))
+    return report
+
+
+# ============ RESULT CACHE ============
+class ResultCache:
+    """Thread-safe LRU of search results with hit/miss counters.
+
+    Keys carry the CSV's size/mtime, so editing a data file makes its old
+    entries unreachable and they age out.
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = allocate_lock()
+
+    def get(self, key):
+        """Cached result rows (copies) or None"""
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [dict(row) for row in rows]
+
+    def put(self, key, rows):
+        """Store result rows, evicting the least recently used entries beyond maxsize"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = [dict(row) for row in rows]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Current size, limit and hit/miss counters"""
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+RESULT_CACHE = ResultCache()
+
+
+def _result_key(filepath, config, query, max_results, stat=None):
+    """Cache key: source, whitespace/case-normalized query, limit and data version"""
+    stat = stat or filepath.stat()
+    normalized = " ".join(str(query).lower().split())
+    return (str(filepath), _index_spec(config), normalized, max_results,
+            stat.st_size, stat.st_mtime_ns)
+
+
+# ============ SEARCH FUNCTIONS ============
+def _collect(data, ranked, output_cols):
+    """Output columns of ranked rows with score > 0"""
     results = []
-    for idx, score in ranked[:max_results]:
+    for idx, score in ranked:
         if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+            results.append(data.row(idx, output_cols))
+    return results
+
+
+def _search_csv(filepath, config, query, max_results, engine="python"):
+    """Core search function using BM25F"""
+    if not filepath.exists():
+        return []
+
+    key = _result_key(filepath, config, query, max_results)
+    results = RESULT_CACHE.get(key)
+    if results is not None:
+        return results
 
+    data, bm25 = _load_index(filepath, config)
+    scorer = _scorer(bm25, engine)
+    tokens, phrases = bm25.parse_query(query)
+    ranked = scorer.score_tokens(tokens, max_results, phrases)
+    results = _collect(data, ranked, config["output_cols"])
+    RESULT_CACHE.put(key, results)
     return results
 
 
-def detect_domain(query):
-    """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+def _explain_rows(bm25, planned, ranked, offset=0):
+    """Per-term score breakdown of each ranked (doc, score) hit with a positive score"""
+    return [{"row": idx - offset, "score": score, **bm25.explain(planned, idx)} for idx, score in ranked if score > 0]
+
+
+def _query_profile(bm25, tokens, phrases):
+    """Tokens, phrases and the planned terms of a query, with their IDF, document frequency and score bound"""
+    terms, _, _ = planned = bm25.plan(tokens, phrases)
+    return planned, {
+        "tokens": tokens,
+        "phrases": phrases,
+        "terms": [{"term": bm25.terms[term], "boost": boost, "idf": bm25.idf[term],
+                   "df": bm25.indptr[term + 1] - bm25.indptr[term], "bound": bm25._bound(term, boost)}
+                  for term, boost in terms]
     }
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
+
+def _finish_profile(profile, start):
+    """Round the stage timings and add the total"""
+    profile["stages"] = {stage: round(ms, 3) for stage, ms in profile.get("stages", {}).items()}
+    profile["total_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return profile
+
+
+def _explain_csv(filepath, config, query, max_results, engine="python"):
+    """_search_csv bypassing the result cache; returns (results, profile).
+
+    The profile holds the engine, the index's origin and size, the time spent
+    in each stage (reading, parsing and fitting the index when it is not warm,
+    then tokenizing, planning, scoring, ranking and collecting rows), the
+    planned query terms and a per-term breakdown of every returned row's score.
+    """
+    start = time.perf_counter()
+    profile = {"engine": engine}
+    data, bm25 = _load_index(filepath, config, profile)
+    stages = profile.setdefault("stages", {})
+    clock = _Stopwatch(stages)
+    scorer = _scorer(bm25, engine)
+    if scorer is not bm25:
+        clock.lap("vectorize")
+    tokens, phrases = bm25.parse_query(query)
+    clock.lap("tokenize")
+    ranked = scorer.score_tokens(tokens, max_results, phrases, stages)
+    clock = _Stopwatch(stages)
+    results = _collect(data, ranked, config["output_cols"])
+    clock.lap("collect")
+
+    planned, profile["query"] = _query_profile(bm25, tokens, phrases)
+    profile["index"] = bm25.stats()
+    profile["rows"] = _explain_rows(bm25, planned, ranked)
+    return results, _finish_profile(profile, start)
+
+
+# ============ DOMAIN DETECTION ============
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+VOCABULARY_WEIGHT = 0.5  # score of a rare query term indexed by one domain only, relative to a keyword
+_VOCABULARY_CONFIG = {"search_cols": ["vocabulary"], "output_cols": []}
+
+
+def _words(text):
+    """Lowercased words of a query or keyword as detect_domain matches them: runs of word characters, and "#" """
+    return re.findall(r"\w+|#", str(text).lower())
+
+
+def _compile_keywords(domain_keywords):
+    """Word trie of keyword tables: nested dicts keyed by word; None holds the (domain, keyword) pairs ending there"""
+    root = {}
+    for domain, keywords in domain_keywords.items():
+        for keyword in keywords:
+            node = root
+            for word in _words(keyword):
+                node = node.setdefault(word, {})
+            node.setdefault(None, []).append((domain, keyword))
+    return root
+
+
+_KEYWORD_TRIE = _compile_keywords(DOMAIN_KEYWORDS)
+
+
+def _vocabulary_sources():
+    """The domain CSVs detect_domain's vocabulary is built from (stacks are never detected)"""
+    return [source for source in _all_sources() if source[0] in CSV_CONFIG]
+
+
+def _build_vocabulary(indexes):
+    """{normalized term: ((domain, weight), ...)} over the indexed terms of (domain, bm25) pairs.
+
+    A term's weight for a domain is the share of its document frequency, relative
+    to the domain's size, that falls in that domain, scaled by its IDF over all
+    domains (1 for a term of a single document). Sizes below the median domain's
+    count as the median, so a small CSV does not win every term it shares.
+    """
+    frequencies, total = defaultdict(dict), 0
+    sizes = sorted(bm25.N for _, bm25 in indexes)
+    floor = sizes[len(sizes) // 2] if sizes else 0
+    for name, bm25 in indexes:
+        total += bm25.N
+        for term, term_id in bm25.vocab.items():
+            # Keyed by normalized term, whether or not the domain's index is normalized
+            counts, freq = frequencies[_normalize(term)], bm25.indptr[term_id + 1] - bm25.indptr[term_id]
+            counts[name] = (max(freq, counts[name][0] if name in counts else 0), max(bm25.N, floor))
+
+    def idf(freq):
+        return log((total - freq + 0.5) / (freq + 0.5) + 1)
+
+    vocabulary, top = {}, idf(1)
+    for term, counts in frequencies.items():
+        if not any(freq for freq, _ in counts.values()):
+            continue
+        shares = {name: freq / size for name, (freq, size) in counts.items()}
+        scale = idf(sum(freq for freq, _ in counts.values())) / top / sum(shares.values())
+        vocabulary[term] = tuple((name, share * scale) for name, share in shares.items() if share)
+    return vocabulary
+
+
+def _load_vocabulary(build=False, rebuild=False):
+    """(domain vocabulary or None, origin) for detect_domain; origin is "memory", "cache", "bundle" or "built".
+
+    A vocabulary persisted for the domain CSVs' size/mtime, or else for their
+    content (in the cache or the bundle), is reused; it is built only when build
+    is true (search.py --build-indexes, the server), never on the query path.
+    It stays in memory until a domain index loaded in this process was built
+    from a different version of its CSV, so the check needs no stat calls.
+    """
+    key = (str(DATA_DIR), "vocabulary")
+    warm = _INDEXES.get(key)
+    if warm and not rebuild and (warm[1] is not None or not build) and all(
+            _INDEXES.get((path, spec), (size, mtime))[:2] == (size, mtime) for path, spec, size, mtime in warm[0]):
+        return warm[1], "memory"
+
+    sources = _vocabulary_sources()
+    version = _sources_version(sources)
+    ref_path = _ref_path(DATA_DIR / "domain-vocabulary", _VOCABULARY_CONFIG) if CACHE_DIR else None
+    ref = _read_cache(ref_path) if ref_path else None
+    entry = None
+    if ref and not rebuild and ref["sources_version"] == version:
+        entry = _read_cache(CACHE_DIR / "objects" / ref["object"])
+    origin = "cache"
+    if entry is None:
+        digest = _sources_digest(sources)
+        object_path = _object_path(digest, _VOCABULARY_CONFIG) if CACHE_DIR else None
+        entry = _read_cache(object_path) if object_path and not rebuild else None
+        if entry is None:
+            bundled = None if rebuild else _read_bundle_segment(_VOCABULARY_BUNDLE_KEY, digest)
+            if bundled:
+                entry, origin = {"version": INDEX_VERSION, "vocabulary": bundled["vocabulary"]}, "bundle"
+            elif build or rebuild:
+                indexes = [(name, _load_index(filepath, config)[1]) for name, filepath, config in sources]
+                entry, origin = {"version": INDEX_VERSION, "vocabulary": _build_vocabulary(indexes)}, "built"
+            if entry and object_path:
+                _write_cache(object_path, entry)
+        if entry and ref_path:
+            _write_cache(ref_path, {"version": INDEX_VERSION, "path": str(DATA_DIR.resolve()),
+                                    "sources_version": version, "object": object_path.name})
+            if ref and ref["object"] != object_path.name:
+                _prune_objects()
+    _INDEXES[key] = (version, entry and entry["vocabulary"])
+    return _INDEXES[key][1], origin
+
+
+def detect_domain(query):
+    """Auto-detect the most relevant domain from query.
+
+    Each DOMAIN_KEYWORDS keyword found in the query as whole words (so "bar" does
+    not match "navbar"; "charts" matches "chart") scores 1 for its domain, and
+    each distinct normalized query word adds VOCABULARY_WEIGHT times its weight
+    in each domain's indexed vocabulary (when one is persisted, see
+    _load_vocabulary). Queries matching nothing go to "style".
+    """
+    words = _words(query)
+    scores = dict.fromkeys([*DOMAIN_KEYWORDS, *CSV_CONFIG], 0.0)
+    vocabulary = _load_vocabulary()[0] or {}
+    for entries in map(vocabulary.get, dict.fromkeys(map(_normalize, words))):
+        for domain, weight in entries or ():
+            scores[domain] += VOCABULARY_WEIGHT * weight
+    # Walk the keyword trie from each word; a word may be the plural of a keyword word
+    matched = set()
+    for start, word in enumerate(words):
+        if word not in _KEYWORD_TRIE and word[:-1] not in _KEYWORD_TRIE:
+            continue
+        node, end = _KEYWORD_TRIE, start
+        while end < len(words):
+            word = words[end]
+            node = node.get(word) or (word.endswith("s") and node.get(word[:-1]))
+            if not node:
+                break
+            matched.update(node.get(None, ()))
+            end += 1
+    for domain, _ in matched:
+        scores[domain] += 1
     best = max(scores, key=scores.get)
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
-    if domain is None:
-        domain = detect_domain(query)
+def _source(domain, stack=None):
+    """Resolve a domain (or stack) to (result header, filepath, index config).
+
+    When the source is unavailable the header is the error dict to return and
+    the other fields are None.
+    """
+    if stack is not None:
+        if stack not in STACK_CONFIG:
+            return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}, None, None
+        filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+        if not filepath.exists():
+            return {"error": f"Stack file not found: {filepath}", "stack": stack}, None, None
+        return {"domain": "stack", "stack": stack}, filepath, _STACK_COLS
 
     config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
     filepath = DATA_DIR / config["file"]
-
     if not filepath.exists():
-        return {"error": f"File not found: {filepath}", "domain": domain}
+        return {"error": f"File not found: {filepath}", "domain": domain}, None, None
+    return {"domain": domain}, filepath, config
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
 
+def _result(header, filepath, query, results):
+    """Assemble the dict returned by search() and search_stack()"""
     return {
-        "domain": domain,
+        **header,
         "query": query,
-        "file": config["file"],
+        "file": filepath.relative_to(DATA_DIR).as_posix(),
         "count": len(results),
         "results": results
     }
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
-    """Search stack-specific guidelines"""
-    if stack not in STACK_CONFIG:
-        return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
-
-    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+def _search_all(query, max_results, engine="python", explain=False):
+    """Score every domain and stack in one pass and keep the top hits of each source.
 
-    if not filepath.exists():
-        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+    Groups are ordered by their best hit; each holds the source file and its rows.
+    explain adds a "profile" as in _explain_csv, loading the combined index as
+    one stage and breaking down the returned rows per group.
+    """
+    start = time.perf_counter()
+    stages = {} if explain else None
+    clock = _Stopwatch(stages)
+    combined = _load_combined_index()
+    bm25 = combined["bm25"]
+    clock.lap("load")
+    scorer = _scorer(bm25, engine)
+    if scorer is not bm25:
+        clock.lap("vectorize")
+    hits = {}
+    tokens, phrases = bm25.parse_query(query)
+    clock.lap("tokenize")
+    for idx, score in scorer.score_tokens(tokens, phrases=phrases, timings=stages):
+        source_hits = hits.setdefault(combined["doc_sources"][idx], [])
+        if len(source_hits) < max_results:
+            source_hits.append((idx, score))
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    clock = _Stopwatch(stages)
+    groups = {}
+    for position, ranked in hits.items():
+        name, file, output_cols = combined["sources"][position]
+        offset = combined["offsets"][position]
+        results = _collect(combined["rows"][position], [(idx - offset, score) for idx, score in ranked], output_cols)
+        groups[name] = {"file": file, "count": len(results), "results": results}
+    clock.lap("collect")
 
-    return {
-        "domain": "stack",
-        "stack": stack,
+    result = {
+        "domain": ALL_DOMAINS,
         "query": query,
-        "file": STACK_CONFIG[stack]["file"],
-        "count": len(results),
-        "results": results
+        "count": sum(group["count"] for group in groups.values()),
+        "groups": groups
     }
+    if explain:
+        planned, query_profile = _query_profile(bm25, tokens, phrases)
+        result["profile"] = _finish_profile({
+            "engine": engine,
+            "stages": stages,
+            "query": query_profile,
+            "index": bm25.stats(),
+            "groups": {combined["sources"][position][0]: _explain_rows(bm25, planned, ranked, combined["offsets"][position])
+                       for position, ranked in hits.items()}
+        }, start)
+    return result
+
+
+def search(query, domain=None, max_results=MAX_RESULTS, engine="python", explain=False):
+    """Main search function with auto-domain detection; domain="all" searches everything.
+
+    explain bypasses the result cache and adds a "profile": stage timings, index
+    size and the per-term contributions to each returned row's score.
+    """
+    if domain is None:
+        domain = detect_domain(query)
+    if domain == ALL_DOMAINS:
+        return _search_all(query, max_results, engine, explain)
+    header, filepath, config = _source(domain)
+    if filepath is None:
+        return header
+    if explain:
+        results, profile = _explain_csv(filepath, config, query, max_results, engine)
+        return {**_result(header, filepath, query, results), "profile": profile}
+    results = _search_csv(filepath, config, query, max_results, engine)
+    return _result(header, filepath, query, results)
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS, engine="python", explain=False):
+    """Search stack-specific guidelines (explain as in search())"""
+    header, filepath, config = _source(None, stack)
+    if filepath is None:
+        return header
+    if explain:
+        results, profile = _explain_csv(filepath, config, query, max_results, engine)
+        return {**_result(header, filepath, query, results), "profile": profile}
+    results = _search_csv(filepath, config, query, max_results, engine)
+    return _result(header, filepath, query, results)
+
+
+def search_many(queries, domain=None, max_results=MAX_RESULTS, engine="python"):
+    """Run many searches in one call and return their results in input order.
+
+    Each query is either a string or a dict with "query" and optional "domain",
+    "stack", "max_results" and "id" (echoed back); domain and max_results are the
+    defaults for entries that do not set them. Queries are answered grouped by
+    source CSV: cached results are reused, the rest are tokenized once per
+    distinct text and scored together, so each index is loaded once and the
+    "numpy" engine scores each group as one batch. An entry that is neither, or
+    whose max_results is not an integer, gets an {"error": ...} result.
+    """
+    queries = list(queries)
+    results = [None] * len(queries)
+
+    def finish(position, spec, result):
+        if "id" in spec:
+            result["id"] = spec["id"]
+        results[position] = result
+
+    groups = defaultdict(list)
+    for position, item in enumerate(queries):
+        if not isinstance(item, (str, dict)):
+            finish(position, {}, {"error": f"Query must be a string or an object with a 'query', not {item!r}"})
+            continue
+        spec = {"query": item} if isinstance(item, str) else item
+        limit = spec.get("max_results")
+        if limit is None:
+            limit = max_results
+        elif isinstance(limit, bool) or not isinstance(limit, int):
+            finish(position, spec, {"error": f"max_results must be an integer, not {limit!r}"})
+            continue
+        text = str(spec.get("query", ""))
+        if spec.get("stack"):
+            source = (None, spec["stack"])
+        else:
+            source = (spec.get("domain") or domain or detect_domain(text), None)
+        groups[source].append((position, text, max(0, limit), spec))
+
+    for (group_domain, stack), items in groups.items():
+        if group_domain == ALL_DOMAINS:
+            for position, text, limit, spec in items:
+                finish(position, spec, _search_all(text, limit, engine))
+            continue
+        header, filepath, config = _source(group_domain, stack)
+        if filepath is None:
+            for position, _, _, spec in items:
+                finish(position, spec, dict(header))
+            continue
+
+        stat = filepath.stat()
+        pending = []
+        for position, text, limit, spec in items:
+            key = _result_key(filepath, config, text, limit, stat)
+            rows = RESULT_CACHE.get(key)
+            if rows is None:
+                pending.append((position, text, limit, spec, key))
+            else:
+                finish(position, spec, _result(header, filepath, text, rows))
+        if not pending:
+            continue
+
+        data, bm25 = _load_index(filepath, config)
+        parsed = {}
+        for _, text, _, _, _ in pending:
+            if text not in parsed:
+                parsed[text] = bm25.parse_query(text)
+        top_k = max(limit for _, _, limit, _, _ in pending)
+        rankings = _scorer(bm25, engine).score_batch([parsed[text][0] for _, text, _, _, _ in pending], top_k,
+                                                     [parsed[text][1] for _, text, _, _, _ in pending])
+        for (position, text, limit, spec, key), ranked in zip(pending, rankings):
+            rows = _collect(data, ranked[:limit], config["output_cols"])
+            RESULT_CACHE.put(key, rows)
+            finish(position, spec, _result(header, filepath, text, rows))
+    return results
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Checks of the search engine on the bundled CSVs, e.g. the NumPy backend
+against the pure-Python one.
+
+Usage: python -m pytest -q test_core.py
+"""
+
+import heapq
+import pickle
+import random
+from functools import lru_cache
+
+import pytest
+
+import core
+
+SOURCES = {name: (filepath, config) for name, filepath, config in core._all_sources()}
+SEED = 1729
+
+
+@lru_cache(maxsize=None)
+def _fitted(name):
+    """(rows, bm25) of a source, parsed and fitted in memory (no cache, no bundle)"""
+    filepath, config = SOURCES[name]
+    rows = core._parse_csv(filepath.read_bytes(), core._stored_columns(config))
+    return rows, core._build_index(rows, config)
+
+
+def _documents(rows, config):
+    """The field texts of every row, as _build_index feeds them to fit()"""
+    columns = [rows.column(col) for col in config["search_cols"]]
+    return [[str(value) for value in values] for values in zip(*columns)]
+
+
+def _queries(bm25, count=40):
+    """Deterministic 1-3 term queries from an index's vocabulary, plus a typo and a phrase"""
+    rng = random.Random(SEED)
+    terms = [term for term in bm25.terms if len(term) > 3]
+    queries = [" ".join(rng.sample(terms, rng.randint(1, 3))) for _ in range(count)]
+    word = max(terms, key=len)
+    queries.append(word[:-2] + word[-1:] + word[-2])
+    queries.append(f'"{" ".join(terms[:2])}" {terms[-1]}')
+    return queries
+
+
+def _postings(bm25):
+    """Per word: IDF, then (doc, tf weight, positions) of each posting; independent of term ids"""
+    postings = {}
+    for word, term in bm25.vocab.items():
+        start, end = bm25.indptr[term], bm25.indptr[term + 1]
+        if start < end:
+            postings[word] = (bm25.idf[term], [
+                (bm25.doc_ids[p], bm25.tf_weights[p], list(bm25.positions[bm25.pos_indptr[p]:bm25.pos_indptr[p + 1]]))
+                for p in range(start, end)])
+    return postings
+
+
+def _assert_same_index(actual, expected):
+    assert actual.N == expected.N
+    assert list(actual.doc_lengths) == list(expected.doc_lengths)
+    assert actual.avgdl == pytest.approx(expected.avgdl)
+    assert actual.avg_field_lengths == pytest.approx(expected.avg_field_lengths)
+    assert _postings(actual) == _postings(expected)
+
+
+@pytest.mark.skipif(not core.HAS_NUMPY, reason="NumPy is not installed")
+@pytest.mark.parametrize("name", SOURCES)
+def test_engine_parity(name):
+    _, bm25 = _fitted(name)
+    python, vectorized = core._scorer(bm25, "python"), core._scorer(bm25, "numpy")
+    assert vectorized is not bm25
+    for query in _queries(bm25):
+        for top_k in (1, 3, None):
+            expected = python.score(query, top_k)
+            actual = vectorized.score(query, top_k)
+            assert [doc for doc, _ in actual] == [doc for doc, _ in expected], query
+            assert [score for _, score in actual] == pytest.approx([score for _, score in expected]), query
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_streaming_build_matches_in_memory_fit(name, monkeypatch):
+    filepath, config = SOURCES[name]
+    _, expected = _fitted(name)
+    monkeypatch.setattr(core, "BUILD_MEMORY", 4096)  # spill pending postings many times over
+    rows = core._stream_csv(filepath, core._stored_columns(config))
+    streamed = core._build_index(rows, config, stream=True)
+    assert streamed.vocab == expected.vocab
+    for attr in ("indptr", "doc_ids", "tf_weights", "pos_indptr", "positions", "idf", "max_weights", "block_max"):
+        assert getattr(streamed, attr) == getattr(expected, attr), attr
+    _assert_same_index(streamed, expected)
+
+
+def test_in_memory_fit_needs_no_temp_file(monkeypatch):
+    import tempfile
+
+    def unwritable(*args, **kwargs):
+        raise OSError("no writable temp dir")
+
+    monkeypatch.setattr(tempfile, "TemporaryFile", unwritable)
+    rows, expected = _fitted("style")
+    config = SOURCES["style"][1]
+    _assert_same_index(core._build_index(rows, config), expected)
+    monkeypatch.setattr(core, "BUILD_MEMORY", 4096)
+    with pytest.raises(OSError):  # only a build that spills opens the temp file
+        core._build_index(rows, config, stream=True)
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_updated_matches_fresh_fit(name):
+    rows, bm25 = _fitted(name)
+    _, config = SOURCES[name]
+    documents = _documents(rows, config)
+    edited = [list(doc) for doc in documents]
+    edited[0][0] += " freshly edited"
+    del edited[len(edited) // 3]
+    edited.append(edited.pop(len(edited) // 2))  # moved, so reused rather than tokenized
+    edited.append(["brand new row"] * len(config["search_cols"]))
+
+    updated, tokenized = bm25.updated(edited)
+    fresh = core.BM25(bm25.k1, bm25.b, bm25.field_weights, bm25.field_normalize)
+    fresh.fit(edited)
+    assert tokenized == 2
+    _assert_same_index(updated, fresh)
+    for query in _queries(fresh, 10):
+        assert updated.score(query, 5) == fresh.score(query, 5), query
+
+
+def test_pickle_leaves_out_the_forward_index():
+    _, bm25 = _fitted("style")
+    loaded = pickle.loads(pickle.dumps(bm25))
+    assert bm25.has_forward and not loaded.has_forward
+    assert len(pickle.dumps(loaded)) == len(pickle.dumps(bm25))
+    loaded.attach_forward(pickle.loads(pickle.dumps(bm25.forward_index())))
+    rows, _ = _fitted("style")
+    documents = _documents(rows, SOURCES["style"][1])
+    assert loaded.updated(documents)[1] == 0
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_pruned_top_k_matches_exhaustive(name):
+    _, bm25 = _fitted(name)
+    rank_key = lambda item: (item[1], -item[0])  # noqa: E731
+    for query in _queries(bm25):
+        terms, _, _ = bm25.plan(bm25.parse_query(query)[0])
+        exhaustive = bm25._accumulate(terms)
+        for depth in (1, 3, 10):
+            pruned = bm25._accumulate(terms, depth)
+            assert (heapq.nlargest(depth, pruned.items(), key=rank_key)
+                    == heapq.nlargest(depth, exhaustive.items(), key=rank_key)), (query, depth)
+
+
+@pytest.mark.parametrize("engine", core.ENGINES)
+def test_non_positive_top_k_selects_nothing(engine):
+    _, bm25 = _fitted("style")
+    scorer = core._scorer(bm25, engine)
+    assert scorer.score("minimal dark", 0) == []
+    assert scorer.score("minimal dark", -1) == []
+
+
+def test_fuzzy_expansion_of_unknown_words():
+    bm25 = core.BM25()
+    bm25.fit(["glassmorphism frosted panels", "minimal flat design", "dark mode dashboard", "neumorphism soft shadows"])
+    exact = bm25.score("glassmorphism")
+    assert bm25.score("glasmorphism") == [(0, pytest.approx(exact[0][1] * core.FUZZY_PENALTY))]  # one deletion
+    assert [doc for doc, _ in bm25.score("neumorphsm")] == [3]
+    assert [doc for doc, _ in bm25.score("dashb")] == [2]  # prefix of a term
+    assert [doc for doc, _ in bm25.score("dezign")] == [1]
+    assert bm25.score("dezigm") == []  # words of 5-7 letters allow one edit
+    assert bm25.query_terms(["glasmorphism"], penalty=0) == []
+
+
+def test_quoted_phrases_filter_results():
+    bm25 = core.BM25()
+    bm25.fit(["minimal flat design", "flat colors and a design grid", "design flat icons"])
+    assert [doc for doc, _ in bm25.score("flat design")] == [0, 2, 1]
+    assert [doc for doc, _ in bm25.score('"flat design"')] == [0]
+    assert [doc for doc, _ in bm25.score('"design flat"')] == [2]
+    assert bm25.score('"flat minimal"') == []
+    assert [doc for doc, _ in bm25.score('"flat dezign"')] == [0]  # phrase words may be fuzzy
+    assert [doc for doc, _ in bm25.score('"flat design" icons')] == [0]
+
+
+@pytest.mark.parametrize("word, stem", [
+    ("categories", "category"), ("classes", "class"), ("charts", "chart"), ("boxes", "box"), ("dishes", "dish"),
+    ("status", "status"), ("analysis", "analysis"), ("glass", "glass"), ("bus", "bus"), ("chart", "chart"),
+])
+def test_stem(word, stem):
+    assert core._stem(word) == stem
+    assert core._stem(stem) == stem
+
+
+def test_normalized_fields_match_plural_and_singular():
+    bm25 = core.BM25(field_normalize=[True])
+    bm25.fit(["pricing cards and charts", "class names"])
+    assert bm25.score("card") == bm25.score("cards")
+    assert [doc for doc, _ in bm25.score("chart")] == [0]
+    assert [doc for doc, _ in bm25.score("classes")] == [1]
+    plain = core.BM25()
+    plain.fit(["pricing cards and charts"])
+    assert plain.query_terms(["card"], penalty=0) == []  # unnormalized fields keep the plural
+
+
+def test_result_cache_follows_csv_edits(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(core, "BUNDLE_FILE", tmp_path / "index.bundle")
+    monkeypatch.setattr(core, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(core, "RESULT_CACHE", core.ResultCache())
+    config = {"search_cols": ["Name", "Keywords"], "output_cols": ["Name"]}
+    csv = tmp_path / "styles.csv"
+    csv.write_text("Name,Keywords\nGlass,frosted blur\nFlat,minimal\n", encoding="utf-8")
+    assert core._search_csv(csv, config, "frosted", 3) == [{"Name": "Glass"}]
+    assert core._search_csv(csv, config, "  FROSTED ", 3) == [{"Name": "Glass"}]
+    assert core.RESULT_CACHE.stats()["hits"] == 1
+
+    csv.write_text("Name,Keywords\nGlass,blur\nAurora,frosted gradients\n", encoding="utf-8")
+    assert core._search_csv(csv, config, "frosted", 3) == [{"Name": "Aurora"}]
+    assert core.RESULT_CACHE.stats()["hits"] == 1
+
+
+def test_search_many_reports_invalid_entries_in_place():
+    results = core.search_many(["glassmorphism", 5, {"query": "glass", "max_results": "2", "id": "a"},
+                                {"query": "glass", "domain": "style", "max_results": None}], "style")
+    assert results[0] == core.search("glassmorphism", "style")
+    assert results[1] == {"error": "Query must be a string or an object with a 'query', not 5"}
+    assert results[2] == {"error": "max_results must be an integer, not '2'", "id": "a"}
+    assert results[3] == core.search("glass", "style")
+
+
+def _domain_vocabulary():
+    return core._build_vocabulary([(name, _fitted(name)[1]) for name, _, _ in core._vocabulary_sources()])
+
+
+@pytest.mark.parametrize("query, domain", [
+    ("navbar", "landing"), ("sticky navbar", "landing"), ("bar chart", "chart"), ("elegant luxury serif", "typography"),
+    ("bento grid", "style"), ("glassmorphism card", "style"), ("react rerender memo", "react"),
+])
+def test_detect_domain(query, domain, monkeypatch):
+    monkeypatch.setattr(core, "_load_vocabulary", lambda: (_domain_vocabulary(), "built"))
+    assert core.detect_domain(query) == domain
+
+
+@pytest.mark.parametrize("query", ["bento grid", "button hover", "loading spinner", "card shadow"])
+def test_small_domains_do_not_win_shared_terms(query, monkeypatch):
+    monkeypatch.setattr(core, "_load_vocabulary", lambda: (_domain_vocabulary(), "built"))
+    assert core.detect_domain(query) != "prompt"
+
+
+def test_queries_never_build_the_vocabulary(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "CACHE_DIR", None)
+    monkeypatch.setattr(core, "BUNDLE_FILE", tmp_path / "index.bundle")
+    monkeypatch.setattr(core, "_INDEXES", {})
+    monkeypatch.setattr(core, "_build_vocabulary", None)
+    assert core._load_vocabulary()[0] is None
+    assert core.detect_domain("navbar") == "style"  # keywords only: "bar" is not a word of "navbar"
+    assert core.detect_domain("bar chart") == "chart"
+    assert not any(key[1] != "vocabulary" for key in core._INDEXES)  # no domain index was loaded
+
+
+def test_vocabulary_is_read_from_the_bundle(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "CACHE_DIR", None)
+    monkeypatch.setattr(core, "BUNDLE_FILE", tmp_path / "index.bundle")
+    monkeypatch.setattr(core, "_INDEXES", {})
+    core.build_bundle()
+    monkeypatch.setattr(core, "_INDEXES", {})
+    vocabulary, origin = core._load_vocabulary()
+    assert origin == "bundle" and vocabulary == _domain_vocabulary()
+    assert core._load_vocabulary() == (vocabulary, "memory")
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Checks of the design system generator on the bundled CSVs, e.g. the compiled
+reasoning rule lookup against the original linear scan.
+
+Usage: python -m pytest -q test_design_system.py
+"""
+
+import random
+
+import design_system
+
+SEED = 1729
+
+
+def _linear_rule(rules, category):
+    """The original _find_reasoning_rule: exact, then partial, then keyword match, each in file order"""
+    category_lower = category.lower()
+    for rule in rules:
+        if rule.get("UI_Category", "").lower() == category_lower:
+            return rule
+    for rule in rules:
+        ui_cat = rule.get("UI_Category", "").lower()
+        if ui_cat in category_lower or category_lower in ui_cat:
+            return rule
+    for rule in rules:
+        ui_cat = rule.get("UI_Category", "").lower()
+        keywords = ui_cat.replace("/", " ").replace("-", " ").split()
+        if any(kw in category_lower for kw in keywords):
+            return rule
+    return {}
+
+
+def _categories(generator, count=1200):
+    """Product types and rule categories, their parts, case variants and random mixes of their words"""
+    rng = random.Random(SEED)
+    names = design_system._product_types() + [rule.get("UI_Category", "") for rule in generator.reasoning_data]
+    words = sorted({word for name in names for word in name.replace("/", " ").replace("-", " ").split()})
+    categories = dict.fromkeys(names + [name.upper() for name in names] + words + ["", " ", "x", "zzz unknown"])
+    categories.update(dict.fromkeys(name[:rng.randint(1, len(name))] for name in names if name))
+    while len(categories) < count:
+        categories[" ".join(rng.sample(words, rng.randint(1, 3)))] = None
+    return list(categories)
+
+
+def test_compiled_rule_lookup_matches_linear_scan():
+    generator = design_system.DesignSystemGenerator()
+    for category in _categories(generator):
+        assert generator._find_reasoning_rule(category) == _linear_rule(generator.reasoning_data, category), category
+
+
+def test_materialized_table_matches_generation(monkeypatch):
+    monkeypatch.setattr(design_system, "CACHE_DIR", None)
+    monkeypatch.setattr(design_system, "_TABLE", {})
+    table = design_system.materialize_design_systems(rebuild=True)
+    product_types = design_system._product_types()
+    assert table["rows"] == len(product_types) == 96
+    generator = design_system.DesignSystemGenerator()
+    for product_type in product_types:
+        query = f"  {product_type.upper()} "  # tokenized like the product type
+        assert design_system._materialized(query) is not None, product_type
+        assert design_system._design_system(query, "Demo") == generator.generate(query, "Demo"), product_type
+    assert design_system._materialized('"SaaS (General)"') is None  # phrases search